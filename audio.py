@@ -0,0 +1,71 @@
+import random
+
+from kivy.clock import Clock
+from kivy.core.audio import SoundLoader
+
+CLICK_SOUNDS = [
+    'assets/audio/01.wav',
+    'assets/audio/02.wav',
+    'assets/audio/03.wav',
+    'assets/audio/04.wav'
+]
+VOICES = 2  # clicks playing at once, whatever the number of sounds; a new one cuts off the oldest
+
+
+class AudioManager:
+    # every sound is decoded once after startup, one per frame on the main
+    # thread (Kivy's sound providers are not thread-safe), so a burst of clicks
+    # never waits on the disk; at most `voices` of them play at once, the
+    # oldest is stopped to make room, and a sound that is still playing
+    # restarts instead of stacking a second copy
+    def __init__(self, sources, voices=VOICES):
+        self.sources = sources
+        self.voices = voices
+        self.samples = {}  # source -> Sound, filled in by the loader
+        self.playing = []  # sounds in the order they were started
+        self.pending = []  # sources still to decode
+
+    def preload(self):
+        if self.pending or self.samples:
+            return
+        self.pending = list(self.sources)
+        Clock.schedule_once(self.load_next)
+
+    def load_next(self, dt):
+        source = self.pending.pop(0)
+        sound = SoundLoader.load(source)
+        if sound is not None:  # nothing loads without an audio device
+            self.samples[source] = sound
+        if self.pending:
+            Clock.schedule_once(self.load_next)
+
+    def play(self, source):
+        sound = self.samples.get(source)
+        if sound is None:
+            return  # not decoded yet
+        self.playing = [other for other in self.playing if other.state == 'play' and other is not sound]
+        if sound.state == 'play':
+            sound.stop()
+        while len(self.playing) >= self.voices:
+            self.playing.pop(0).stop()  # steal the oldest voice
+        sound.play()
+        self.playing.append(sound)
+
+    def play_random(self):
+        self.play(random.choice(self.sources))
+
+
+class NullAudio:
+    # muted or headless: nothing is loaded and nothing plays
+    def preload(self):
+        pass
+
+    def play(self, source):
+        pass
+
+    def play_random(self):
+        pass
+
+
+def create_audio(muted=False):
+    return NullAudio() if muted else AudioManager(CLICK_SOUNDS)
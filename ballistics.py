@@ -0,0 +1,52 @@
+from functools import lru_cache
+
+import numpy as np
+
+from simulation import BASE_WIDTH, BASE_HEIGHT, PROJECTILES, muzzle_speed
+
+# Precomputed free-flight arcs for the aim preview of bullets and bombs: one
+# table per (projectile type, muzzle velocity), one row per quantized angle,
+# so a mouse move only looks up a row and clips it against the grid.
+
+ANGLE_STEP = 0.5  # degrees between table rows
+PREVIEW_TICKS = 150  # long enough for the slowest lob to land
+
+
+@lru_cache(maxsize=None)
+def ballistic_arcs(projectile_type, muzzle_velocity):
+    # x and y of the projectile after every tick at the base tick rate, for
+    # every angle from -90 to 90 degrees; a World at any tick rate passes
+    # through these points, its parabola written in closed form
+    angles = np.radians(np.arange(-90, 90 + ANGLE_STEP, ANGLE_STEP))
+    speed = muzzle_speed(projectile_type, muzzle_velocity)
+    gravity = PROJECTILES[projectile_type]['mass'] * 9.81
+    ticks = np.arange(PREVIEW_TICKS + 1)
+    dx = (speed * np.cos(angles))[:, None]
+    dy = (speed * np.sin(angles))[:, None]
+    xs = dx * ticks
+    ys = BASE_HEIGHT / 2 + dy * ticks - gravity * ticks * (ticks + 1) / 2
+    return xs.astype(np.float32), ys.astype(np.float32)
+
+
+def preview_points(board, projectile_type, muzzle_velocity, angle):
+    # flat [x0, y0, x1, y1, ...] list of the projectile's centre along its arc,
+    # up to the first collidable tile or the edge of the screen
+    xs, ys = ballistic_arcs(projectile_type, muzzle_velocity)
+    row = int(round((min(max(angle, -90), 90) + 90) / ANGLE_STEP))
+    x, y = xs[row], ys[row]
+    size = PROJECTILES[projectile_type]['size']
+
+    # swept box of every tick, as in the World broadphase
+    hit = board.solid_counts(np.minimum(x[:-1], x[1:]), np.minimum(y[:-1], y[1:]),
+                             size + np.abs(np.diff(x)), size + np.abs(np.diff(y))) > 0
+    off_screen = (x[1:] < 0) | (x[1:] > BASE_WIDTH) | (y[1:] < 0) | (y[1:] > BASE_HEIGHT)
+    end = len(x)
+    stops = np.flatnonzero(hit | off_screen)
+    if len(stops):
+        first = stops[0]
+        end = first + 2 if hit[first] else first + 1
+
+    points = np.empty((end, 2), np.float32)
+    points[:, 0] = x[:end] + size / 2
+    points[:, 1] = y[:end] + size / 2
+    return points.ravel().tolist()
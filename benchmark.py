@@ -0,0 +1,261 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+import numpy as np
+
+from ballistics import preview_points
+from levels import LevelPack, compile_levels, read_levels
+from simulation import World, Board, PROJECTILE_TYPES, laser_path
+
+# Headless benchmarks for the physics, collisions and level handling. Every
+# layout in the level files is loaded and the same scripted volleys are fired
+# at each one. A pass of a workload always does the same work, so every pass
+# is timed, the passes of all repeats are pooled, and a metric is computed
+# from the fastest pass: other load on the machine only ever slows a pass
+# down, so the fastest one is what runs on one machine agree on. A reference
+# workload that involves none of the game's code is timed alongside, and a
+# comparison scales the metrics by how fast it ran against the baseline's,
+# so a machine that is slower for the whole run does not look like a
+# regression.
+#
+#   python benchmark.py --save baseline.json        # record a baseline
+#   python benchmark.py --baseline baseline.json    # fail on a regression
+
+ANGLES = range(-60, 61, 5)
+VELOCITIES = range(1, 6)
+VOLLEY_TICKS = 300  # ten seconds of flight at the base tick rate
+LOADS_PER_LEVEL = 200  # per pass over the pack
+ROUND_SECONDS = 0.1  # a workload runs passes for at least this long in each round
+ROUNDS = 10  # rounds per repeat, every workload taking one turn in each
+MIN_REPEAT = 3  # repeats needed to record a baseline or compare against one
+
+# metric -> True when higher is better
+METRICS = {
+    'ticks_per_sec': True,
+    'collision_checks_per_sec': True,
+    'destroy_redraw_ms': False,
+    'level_load_ms': False,
+}
+METRICS.update({f'ticks_per_sec.{t}': True for t in PROJECTILE_TYPES})
+
+
+class CountingWorld(World):
+    # counts the swept collision tests the volleys cause
+    checks = 0
+
+    def sweep(self, projectile, events):
+        self.checks += 1
+        return super().sweep(projectile, events)
+
+
+def measure(workload):
+    # run workload until ROUND_SECONDS of it were timed; it returns (seconds,
+    # count, ...) for one pass, and the seconds of every pass are returned
+    # with the counts, which are the same for each pass
+    seconds = []
+    counts = None
+    while sum(seconds) < ROUND_SECONDS:
+        elapsed, *counts = workload()
+        seconds.append(elapsed)
+    return seconds, counts
+
+
+def volley(layout, projectile_type):
+    # every scripted shot of one type fired at once, run until all are gone;
+    # returns (seconds, ticks, collision checks)
+    world = CountingWorld(layout)
+    velocities = [1] if projectile_type == 'laser' else VELOCITIES
+    for angle in ANGLES:
+        for muzzle_velocity in velocities:
+            world.fire(angle, muzzle_velocity, projectile_type)
+    start = perf_counter()
+    ticks = 0
+    while world.projectiles and ticks < VOLLEY_TICKS:
+        world.step()
+        ticks += 1
+    return perf_counter() - start, ticks, world.checks
+
+
+def volley_workloads(layouts):
+    # one workload per projectile type, a pass firing at every layout
+    def volleys(projectile_type):
+        laser_path.cache_clear()  # every pass traces its lasers from scratch
+        return np.sum([volley(layout, projectile_type) for layout in layouts], 0)
+
+    return {f'volley.{t}': lambda t=t: volleys(t) for t in PROJECTILE_TYPES}
+
+
+def destroy_workload(layouts):
+    # what the game recomputes when a rock goes: the board and its collision
+    # table, the aim preview of the selected projectile and the laser trace
+    def clear_rocks():
+        laser_path.cache_clear()
+        seconds = 0.0
+        destroyed = 0
+        for layout in layouts:
+            board = Board(layout)
+            rocks = [coord for coord, element in board.tiles() if element == 'r']
+            start = perf_counter()
+            for coord in rocks:
+                board.destroy(coord)
+                board.solid_table()
+                preview_points(board, 'bullet', 3, 0)
+                laser_path(board.key, 0)
+            seconds += perf_counter() - start
+            destroyed += len(rocks)
+        return seconds, destroyed
+
+    return clear_rocks
+
+
+def reference():
+    # fixed work outside the game's code, Python arithmetic and small NumPy
+    # calls like a physics tick makes
+    values = np.arange(64, dtype=float)
+    start = perf_counter()
+    total = 0.0
+    for i in range(2000):
+        total += float(np.sum(values * i)) % 7 + sum(range(20))
+    return perf_counter() - start, 1
+
+
+def level_load_workload(pack):
+    # a random layout out of a compiled pack, turned into a ready World
+    def load_all():
+        start = perf_counter()
+        loads = 0
+        for level in pack.levels:
+            for _ in range(LOADS_PER_LEVEL):
+                World(pack.random_layout(level))
+                loads += 1
+        return perf_counter() - start, loads
+
+    return load_all
+
+
+def metrics(passes, counts):
+    # every metric from the fastest pass of each workload
+    seconds = {name: min(times) for name, times in passes.items()}
+    results = {}
+    for t in PROJECTILE_TYPES:
+        results[f'ticks_per_sec.{t}'] = counts[f'volley.{t}'][0] / seconds[f'volley.{t}']
+    volley_seconds = sum(seconds[f'volley.{t}'] for t in PROJECTILE_TYPES)
+    results['ticks_per_sec'] = sum(counts[f'volley.{t}'][0] for t in PROJECTILE_TYPES) / volley_seconds
+    results['collision_checks_per_sec'] = sum(counts[f'volley.{t}'][1] for t in PROJECTILE_TYPES) / volley_seconds
+    results['destroy_redraw_ms'] = 1000 * seconds['destroy'] / max(counts['destroy'][0], 1)
+    results['level_load_ms'] = 1000 * seconds['level_load'] / max(counts['level_load'][0], 1)
+    return {name: results[name] for name in METRICS}
+
+
+def run(files, repeat, passes=None, counts=None):
+    # passes and counts carry the timings of an earlier run to pool with.
+    # The workloads take turns in short rounds, so a stretch of time the
+    # machine is slowed down for costs a few passes of each of them rather
+    # than every pass of one
+    layouts = [layout for file_path in files for layout in read_levels(file_path)]
+    passes = {} if passes is None else passes
+    counts = {} if counts is None else counts
+    with tempfile.TemporaryDirectory() as directory:
+        pack_path = os.path.join(directory, 'levels.pack')
+        compile_levels(files, pack_path)
+        pack = LevelPack(pack_path)
+        random.seed(0)
+        workloads = volley_workloads(layouts)
+        workloads['destroy'] = destroy_workload(layouts)
+        workloads['level_load'] = level_load_workload(pack)
+        workloads['reference'] = reference
+        for _ in range(repeat * ROUNDS):
+            for name, workload in workloads.items():
+                seconds, count = measure(workload)
+                passes.setdefault(name, []).extend(seconds)
+                counts[name] = count
+        pack.close()
+    return {
+        'metrics': metrics(passes, counts),
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__,
+                        'machine': platform.machine(), 'system': platform.system(),
+                        'layouts': len(layouts), 'repeat': repeat,
+                        'reference_ms': 1000 * min(passes['reference'])},
+    }
+
+
+def compare(report, baseline, threshold):
+    # one line per metric, the change scaled by how much slower the
+    # reference ran than in the baseline; returns the names that got worse
+    # than threshold
+    regressions = []
+    slowdown = 1.0
+    if 'reference_ms' in baseline['environment']:
+        slowdown = report['environment']['reference_ms'] / baseline['environment']['reference_ms']
+    lines = [f"{'machine speed':<28}{1 / slowdown - 1:+22.1%} vs baseline, changes below allow for it"]
+    for name, value in report['metrics'].items():
+        old = baseline['metrics'].get(name)
+        if not old:
+            lines.append(f'{name:<28}{value:14.4f}  (no baseline)')
+            continue
+        change = (value * slowdown if METRICS[name] else value / slowdown) / old - 1
+        worse = -change if METRICS[name] else change
+        flag = ''
+        if worse > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        lines.append(f'{name:<28}{value:14.4f}  {change:+7.1%} vs {old:.4f}{flag}')
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark physics, collisions and level loading.')
+    parser.add_argument('files', nargs='*', help='level files (default: assets/level_data/*.txt)')
+    parser.add_argument('--repeat', type=int, default=MIN_REPEAT,
+                        help='runs of every benchmark, their passes are pooled')
+    parser.add_argument('--save', help='write the results to this file as a baseline')
+    parser.add_argument('--baseline', help='compare against this baseline')
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help='fail when a metric is this much worse than the baseline')
+    args = parser.parse_args()
+    if (args.baseline or args.save) and args.repeat < MIN_REPEAT:
+        parser.error(f'--save and --baseline need --repeat {MIN_REPEAT} or more, fewer runs are too noisy to compare')
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+        if baseline['environment'].get('repeat', 0) < MIN_REPEAT:
+            parser.error(f'{args.baseline} was recorded with fewer than {MIN_REPEAT} repeats, record it again')
+
+    files = args.files or sorted(glob.glob('assets/level_data/*.txt'))
+    passes, counts = {}, {}
+    report = run(files, args.repeat, passes, counts)
+
+    regressions = []
+    if baseline:
+        lines, regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            # the machine can be slowed down for a whole run; a real
+            # regression is still there once a second run is pooled in
+            print(f"rechecking {', '.join(regressions)}", file=sys.stderr)
+            report = run(files, args.repeat, passes, counts)
+            report['environment']['repeat'] = 2 * args.repeat
+            lines, regressions = compare(report, baseline, args.threshold)
+    else:
+        lines = [f'{name:<28}{value:14.4f}' for name, value in report['metrics'].items()]
+    print('\n'.join(lines))
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(report, file, indent=2)
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}: "
+              f"{', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
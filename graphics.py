@@ -0,0 +1,285 @@
+import numpy as np
+from kivy.core.image import Image as CoreImage
+from kivy.graphics import (Color, Rectangle, Mesh, Fbo, ClearColor, ClearBuffers, InstructionGroup,
+                           PushMatrix, PopMatrix, MatrixInstruction, Line, Point)
+from kivy.graphics.transformation import Matrix
+from kivy.uix.widget import Widget
+from simulation import BASE_WIDTH, BASE_HEIGHT, TILE_SIZE, PROJECTILES, PROJECTILE_TYPES
+
+# Texture mappings
+TILE_TEXTURES = {
+    'r': 'assets/tiles/rock.png',
+    'm': 'assets/tiles/mirror.png',
+    't': 'assets/tiles/target.png',
+    'p': 'assets/tiles/perpetio.png',
+    'g': 'assets/tiles/gravitonio.png',
+    '1': 'assets/tiles/wormhole_orange.png',
+    '2': 'assets/tiles/wormhole_orange.png',
+    '3': 'assets/tiles/wormhole_orange.png',
+    '4': 'assets/tiles/wormhole_orange.png',
+    '5': 'assets/tiles/wormhole_blue.png',
+    '6': 'assets/tiles/wormhole_blue.png',
+    '7': 'assets/tiles/wormhole_blue.png',
+    '8': 'assets/tiles/wormhole_blue.png'
+}
+TILE_IMAGE_SIZE = 180  # every png in assets/tiles is 180x180
+
+
+class TileAtlas:
+    # all tile images rendered side by side into one texture, so the board
+    # can be drawn with a single textured mesh
+    def __init__(self):
+        sources = sorted(set(TILE_TEXTURES.values()))
+        size = TILE_IMAGE_SIZE
+        self.fbo = Fbo(size=(size * len(sources), size))
+        with self.fbo:
+            ClearColor(0, 0, 0, 0)
+            ClearBuffers()
+            Color(1, 1, 1, 1)
+            for i, source in enumerate(sources):
+                Rectangle(texture=CoreImage(source).texture, pos=(i * size, 0), size=(size, size))
+        self.fbo.draw()
+        self.texture = self.fbo.texture
+
+        # uv rectangle of every image, inset by half a texel against bleeding
+        width = float(size * len(sources))
+        half_texel_u, half_texel_v = 0.5 / width, 0.5 / size
+        self.uvs = {}
+        for i, source in enumerate(sources):
+            self.uvs[source] = ((i * size) / width + half_texel_u, half_texel_v,
+                                ((i + 1) * size) / width - half_texel_u, 1 - half_texel_v)
+
+    def uv(self, element):
+        return self.uvs[TILE_TEXTURES[element]]
+
+
+_tile_atlas = None
+
+
+def get_tile_atlas():
+    # built on first use (it needs the GL context) and then shared
+    global _tile_atlas
+    if _tile_atlas is None:
+        _tile_atlas = TileAtlas()
+    return _tile_atlas
+
+
+class BoardMesh(InstructionGroup):
+    # the whole 8x6 board as one Mesh, four vertices per drawn tile; tiles
+    # removed during a tick are batched and uploaded by a single flush()
+    def __init__(self, board, **kwargs):
+        super().__init__(**kwargs)
+        self.atlas = get_tile_atlas()
+        self.add(Color(1, 1, 1, 1))
+        self.mesh = Mesh(mode='triangles', texture=self.atlas.texture)
+        self.add(self.mesh)
+        self.update(board)
+
+    def update(self, board):
+        vertices = []
+        self.indices = []
+        self.quads = {}  # coord -> quad number in the mesh
+        w = h = TILE_SIZE
+        for coord, element in board.tiles():
+            if element not in TILE_TEXTURES:
+                continue
+            x, y = board.tile_pos(coord)
+            u0, v0, u1, v1 = self.atlas.uv(element)
+            i = len(vertices) // 4
+            self.quads[coord] = len(self.quads)
+            vertices += [x, y, u0, v0,
+                         x + w, y, u1, v0,
+                         x + w, y + h, u1, v1,
+                         x, y + h, u0, v1]
+            self.indices += [i, i + 1, i + 2, i + 2, i + 3, i]
+        self.mesh.vertices = vertices
+        self.mesh.indices = self.indices
+        self.dirty = False
+
+    def remove_tile(self, coord):
+        quad = self.quads.pop(coord, None)
+        if quad is None:
+            return
+        # collapse the quad into degenerate triangles, nothing else moves
+        self.indices[6 * quad:6 * quad + 6] = [0] * 6
+        self.dirty = True
+
+    def flush(self):
+        if self.dirty:
+            self.mesh.indices = self.indices
+            self.dirty = False
+
+
+class Camera:
+    # a single matrix instruction around a widget's canvas and children that
+    # maps world units onto the widget, so a resize only rewrites the matrix
+    def __init__(self, widget):
+        self.widget = widget
+        with widget.canvas.before:
+            PushMatrix()
+            self.transform = MatrixInstruction()
+        with widget.canvas.after:
+            PopMatrix()
+        widget.bind(pos=self.update, size=self.update)
+        self.update()
+
+    def update(self, *args):
+        self.scale_x = self.widget.width / BASE_WIDTH
+        self.scale_y = self.widget.height / BASE_HEIGHT
+        self.transform.matrix = Matrix().scale(self.scale_x, self.scale_y, 1).translate(
+            self.widget.x, self.widget.y, 0)
+
+    def to_world(self, x, y):
+        return (x - self.widget.x) / self.scale_x, (y - self.widget.y) / self.scale_y
+
+
+class AimPreview(Widget):
+    # where the selected projectile would go, drawn in world units: a line
+    # for the laser's path, dots for a ballistic arc
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        with self.canvas:
+            Color(1, 0, 0, 0.5)
+            self.line = Line(points=[], width=1.5)
+            Color(1, 1, 1, 0.6)
+            self.dots = Point(points=[], pointsize=3)
+
+    def show_path(self, points):
+        self.dots.points = []
+        self.line.points = [coordinate for point in points for coordinate in point]
+
+    def show_dots(self, points):
+        self.line.points = []
+        self.dots.points = points
+
+    def clear(self):
+        self.line.points = []
+        self.dots.points = []
+
+
+class ShapeBatch:
+    # many copies of one shape drawn by a single Mesh; every copy's vertices
+    # are written into preallocated float32 and uint16 buffers that the mesh
+    # reads in place, grown by doubling when more copies are needed. This is
+    # the projectile pool on the drawing side: shots come and go without
+    # creating or freeing a widget, an instruction or a vertex buffer. It is
+    # not garbage-free: the World still makes a Projectile view per shot and
+    # ProjectileLayer.update a few small NumPy temporaries per frame
+    MAX_VERTICES = 65536  # the mesh indices are unsigned shorts
+
+    def __init__(self, indices, uvs, texture=None):
+        self.shape_indices = np.array(indices, np.uint16)
+        self.uvs = np.array(uvs, np.float32).reshape(-1, 2)
+        self.vertex_count = len(self.uvs)
+        self.max_copies = self.MAX_VERTICES // self.vertex_count
+        self.mesh = Mesh(mode='triangles', texture=texture)
+        self.count = 0
+        self.reserve(16)
+
+    def reserve(self, capacity):
+        self.capacity = min(capacity, self.max_copies)
+        self.vertices = np.empty((self.capacity, self.vertex_count, 4), np.float32)
+        self.vertices[:, :, 2:] = self.uvs
+        first = np.arange(self.capacity, dtype=np.uint16)[:, None] * self.vertex_count
+        self.indices = self.shape_indices[None, :] + first
+
+    def update(self, xs, ys):
+        # xs and ys hold one row of vertex positions per copy
+        count = self.resize(len(xs))
+        if count:
+            self.vertices[:count, :, 0] = xs[:count]
+            self.vertices[:count, :, 1] = ys[:count]
+            self.mesh.vertices = self.vertices[:count].reshape(-1)
+
+    def place(self, xs, ys, shape_x, shape_y):
+        # one copy of the shape at each (x, y), added up straight into the
+        # vertex buffer without a temporary per vertex
+        count = self.resize(len(xs))
+        if count:
+            np.add(xs[:count, None], shape_x, out=self.vertices[:count, :, 0])
+            np.add(ys[:count, None], shape_y, out=self.vertices[:count, :, 1])
+            self.mesh.vertices = self.vertices[:count].reshape(-1)
+
+    def resize(self, count):
+        # copies drawn from now on; the index buffer only changes with them
+        count = min(count, self.max_copies)
+        if count > self.capacity:
+            self.reserve(max(count, 2 * self.capacity))
+        if count != self.count:
+            if count:
+                self.mesh.indices = self.indices[:count].reshape(-1)
+            else:
+                self.mesh.indices = []
+                self.mesh.vertices = []
+            self.count = count
+        return count
+
+
+def disc_shape(size, segments=12):
+    # x and y offsets of a filled circle in a size x size box: the centre,
+    # then the rim, and the triangles fanning out between them
+    angles = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    radius = size / 2
+    xs = radius + np.concatenate([[0], radius * np.cos(angles)])
+    ys = radius + np.concatenate([[0], radius * np.sin(angles)])
+    indices = []
+    for i in range(segments):
+        indices += [0, 1 + i, 1 + (i + 1) % segments]
+    return xs, ys, indices
+
+
+QUAD_INDICES = [0, 1, 2, 2, 3, 0]
+
+
+class ProjectileLayer(Widget):
+    # every live projectile, drawn straight from the World's projectile
+    # store in world units: one mesh per projectile type, whatever the
+    # number of projectiles in flight
+    bomb_source = 'assets/weapons/bombshell.png'
+    laser_width = 2
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.disc_x, self.disc_y, disc_indices = disc_shape(PROJECTILES['bullet']['size'])
+        bomb_size = PROJECTILES['bomb']['size']
+        self.quad_x = np.array([0, bomb_size, bomb_size, 0], np.float32)
+        self.quad_y = np.array([0, 0, bomb_size, bomb_size], np.float32)
+        bomb_texture = CoreImage(self.bomb_source).texture
+
+        self.batches = {}
+        with self.canvas:
+            Color(0.2, 0.2, 0.2, 1)
+            self.batches['bullet'] = ShapeBatch(disc_indices, np.zeros(2 * len(self.disc_x)))
+            Color(1, 1, 1, 1)  # White color to display the texture correctly
+            self.batches['bomb'] = ShapeBatch(QUAD_INDICES, bomb_texture.tex_coords, bomb_texture)
+            Color(1, 0, 0, 1)
+            self.batches['laser'] = ShapeBatch(QUAD_INDICES, np.zeros(8))
+
+    def update(self, store, alpha=1):
+        # alpha is how far the frame is into the current physics step
+        n = store.count
+        px, py = store.px[:n], store.py[:n]
+        x = px + (store.x[:n] - px) * alpha
+        y = py + (store.y[:n] - py) * alpha
+        live = store.alive[:n]
+        types = store.type[:n]
+        for type_index, projectile_type in enumerate(PROJECTILE_TYPES):
+            rows = live & (types == type_index)
+            if projectile_type == 'bullet':
+                self.batches['bullet'].place(x[rows], y[rows], self.disc_x, self.disc_y)
+            elif projectile_type == 'bomb':
+                self.batches['bomb'].place(x[rows], y[rows], self.quad_x, self.quad_y)
+            else:
+                bx, by = x[rows][:, None], y[rows][:, None]
+                # a short beam along the direction of travel
+                dx, dy = store.dx[:n][rows][:, None], store.dy[:n][rows][:, None]
+                length = np.hypot(dx, dy)
+                length[length == 0] = 1
+                nx, ny = -dy / length * self.laser_width, dx / length * self.laser_width
+                self.batches['laser'].update(
+                    np.hstack([bx + nx, bx - nx, bx + dx - nx, bx + dx + nx]),
+                    np.hstack([by + ny, by - ny, by + dy - ny, by + dy + ny]))
+
+    def clear(self):
+        for batch in self.batches.values():
+            batch.update(np.empty((0, 1)), np.empty((0, 1)))
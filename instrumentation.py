@@ -0,0 +1,81 @@
+import csv
+import json
+import logging
+import os
+from collections import deque
+from functools import wraps
+from time import perf_counter
+
+import numpy as np
+
+# Named timing spans with rolling percentiles, and the game's debug output.
+# Everything is off by default: a timed function then costs one flag check,
+# and debug messages are neither formatted nor written. Turn it on with
+# CANNON_PROFILE=1 or the in-game HUD (F3).
+
+WINDOW = 600  # samples kept per span, about ten seconds of frames
+
+logger = logging.getLogger('cannon')
+
+
+class Instrumentation:
+    def __init__(self, window=WINDOW, enabled=False):
+        self.window = window
+        self.enabled = enabled
+        self.samples = {}  # span name -> deque of seconds
+
+    def record(self, name, seconds):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def timed(self, name):
+        def decorate(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(name, perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def debug(self, message, *args):
+        if self.enabled:
+            logger.info(message, *args)
+
+    def stats(self, name):
+        # count, mean and p50/p95/p99 in milliseconds over the window
+        samples = self.samples.get(name)
+        if not samples:
+            return None
+        values = np.fromiter(samples, float, len(samples)) * 1000
+        p50, p95, p99 = np.percentile(values, (50, 95, 99))
+        return {'count': len(values), 'mean': float(values.mean()),
+                'p50': float(p50), 'p95': float(p95), 'p99': float(p99)}
+
+    def summary(self):
+        return {name: self.stats(name) for name in sorted(self.samples) if self.samples[name]}
+
+    def reset(self):
+        self.samples.clear()
+
+    def export_json(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.summary(), file, indent=2)
+
+    def export_csv(self, path):
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['span', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'])
+            for name, stats in self.summary().items():
+                writer.writerow([name, stats['count']] +
+                                [f"{stats[key]:.4f}" for key in ('mean', 'p50', 'p95', 'p99')])
+
+
+instruments = Instrumentation(enabled=bool(os.environ.get('CANNON_PROFILE')))
+timed = instruments.timed
@@ -0,0 +1,201 @@
+import heapq
+import json
+import os
+import time
+
+from simulation import PROJECTILE_TYPES
+
+# High scores. Every recorded run is appended to a history log, one JSON line
+# per board it counts for, and each board keeps only its best TOP_N runs in a
+# min-heap, so a new run costs O(log TOP_N) however many runs were recorded.
+# The history line is what makes a run durable. The heaps are only saved, as
+# an atomic snapshot together with how much of the history they cover, every
+# SNAPSHOT_EVERY runs and when the game closes; anything appended after the
+# last snapshot is replayed on load, and deleting the snapshot rebuilds every
+# board from the history.
+#
+# Boards: 'overall' (final score of a finished game), 'level:<n>' (points
+# for winning level n) and 'projectile:<type>' (level wins by projectile).
+
+HISTORY_PATH = 'assets/scores.log'
+SNAPSHOT_PATH = 'assets/leaderboard.json'
+LEGACY_PATH = 'assets/high_scores.txt'  # name: score per line, best first
+TOP_N = 100
+SNAPSHOT_EVERY = 50  # runs appended between two snapshots
+
+OVERALL = 'overall'
+
+
+def level_board(level):
+    return f'level:{level}'
+
+
+def projectile_board(projectile_type):
+    return f'projectile:{projectile_type}'
+
+
+def board_title(board):
+    kind, _, value = board.partition(':')
+    if kind == 'level':
+        return f'Level {value}'
+    if kind == 'projectile':
+        return f'{value.capitalize()} wins'
+    return 'Hall of Fame'
+
+
+def board_order(board):
+    # overall first, then levels in order, then projectile types
+    kind, _, value = board.partition(':')
+    if kind == 'level':
+        return 1, int(value)
+    if kind == 'projectile':
+        return 2, PROJECTILE_TYPES.index(value) if value in PROJECTILE_TYPES else len(PROJECTILE_TYPES)
+    return 0, 0
+
+
+class Leaderboard:
+    def __init__(self, history_path=HISTORY_PATH, snapshot_path=SNAPSHOT_PATH,
+                 legacy_path=LEGACY_PATH, top_n=TOP_N):
+        self.history_path = history_path
+        self.snapshot_path = snapshot_path
+        self.top_n = top_n
+        self.boards = {}  # board -> min-heap of (score, -time, username)
+        self.offset = 0  # bytes of history folded into the boards
+        self.unsaved = 0  # runs appended since the last snapshot
+        self.load()
+        if not os.path.exists(history_path):
+            self.migrate(legacy_path)
+        elif self.replay():
+            self.save()
+
+    def load(self):
+        try:
+            with open(self.snapshot_path, 'r') as file:
+                snapshot = json.load(file)
+            if snapshot['top_n'] != self.top_n:
+                return
+            self.boards = {board: [tuple(entry) for entry in heap]
+                           for board, heap in snapshot['boards'].items()}
+            self.offset = snapshot['offset']
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            self.boards = {}
+            self.offset = 0
+
+    def replay(self):
+        # fold in the history written after the snapshot; returns whether
+        # anything changed
+        start = self.offset
+        if os.path.exists(self.history_path) and os.path.getsize(self.history_path) < start:
+            # the history was replaced, the snapshot no longer matches it
+            self.boards = {}
+            self.offset = start = 0
+        try:
+            with open(self.history_path, 'rb+') as file:
+                file.seek(start)
+                for line in file:
+                    if not line.endswith(b'\n'):
+                        # a run cut off mid-write, drop it so the next one
+                        # starts on a line of its own
+                        file.truncate(self.offset)
+                        break
+                    try:
+                        run = json.loads(line)
+                        self.push(run['board'], run['score'], run['time'], run['username'])
+                    except (ValueError, KeyError):
+                        pass
+                    self.offset += len(line)
+        except FileNotFoundError:
+            pass
+        return self.offset != start
+
+    def migrate(self, legacy_path):
+        # one-time import of the old top three file into the overall board
+        runs = []
+        try:
+            with open(legacy_path, 'r') as file:
+                for line in file:
+                    try:
+                        name, score = line.strip().rsplit(': ', 1)
+                        runs.append((OVERALL, name, int(score)))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        self.append(runs)
+
+    def push(self, board, score, run_time, username):
+        heap = self.boards.setdefault(board, [])
+        # on equal scores the earlier run ranks higher
+        entry = (score, -run_time, username)
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def append(self, runs):
+        now = time.time()
+        data = b''.join(json.dumps({'board': board, 'username': username, 'score': score, 'time': now},
+                                   ensure_ascii=False).encode('utf-8') + b'\n'
+                        for board, username, score in runs)
+        # one write per record call, so a crash loses at most the last line
+        with open(self.history_path, 'ab') as file:
+            file.write(data)
+        for board, username, score in runs:
+            self.push(board, score, now, username)
+        self.offset += len(data)
+        self.unsaved += len(runs)
+        if self.unsaved >= SNAPSHOT_EVERY:
+            self.save()
+
+    def record(self, username, score, level=None, projectile_type=None):
+        # a finished game without a level, a won level with one
+        if level is None:
+            self.append([(OVERALL, username, score)])
+            return
+        runs = [(level_board(level), username, score)]
+        if projectile_type is not None:
+            runs.append((projectile_board(projectile_type), username, score))
+        self.append(runs)
+
+    def save(self):
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump({'top_n': self.top_n, 'offset': self.offset, 'boards': self.boards}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        self.unsaved = 0
+
+    def flush(self):
+        if self.unsaved:
+            self.save()
+
+    def board_names(self):
+        return sorted((board for board, heap in self.boards.items() if heap), key=board_order)
+
+    def size(self, board):
+        return len(self.boards.get(board, ()))
+
+    def page(self, board, page, page_size):
+        # [(rank, username, score), ...] for one page of a board, best first
+        ranked = sorted(self.boards.get(board, ()), reverse=True)
+        start = page * page_size
+        return [(start + i + 1, username, score)
+                for i, (score, _, username) in enumerate(ranked[start:start + page_size])]
+
+
+_leaderboard = None
+
+
+def get_leaderboard():
+    # loaded on first use and then shared
+    global _leaderboard
+    if _leaderboard is None:
+        _leaderboard = Leaderboard()
+    return _leaderboard
+
+
+def close_leaderboard():
+    # snapshot the runs recorded since the last one, if the boards were loaded
+    if _leaderboard is not None:
+        _leaderboard.flush()
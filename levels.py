@@ -0,0 +1,178 @@
+import argparse
+import glob
+import mmap
+import os
+import random
+import struct
+import threading
+import zlib
+
+# Level layouts are written as text, one line per layout: 48 tile characters
+# (8 columns x 6 rows, bottom row first) followed by the number of shots.
+# For the game they are compiled into one binary pack:
+#
+#   header   magic, format version, number of levels, crc32 of the index
+#   index    per level: level number, first record, number of records
+#   records  fixed 49-byte layouts, back to back
+#   crcs     crc32 of every record
+#
+# so picking a layout reads a single record through mmap, whatever the size
+# of the pack, and malformed layouts are rejected when the pack is built.
+
+LEVEL_DIR = 'assets/level_data'
+PACK_PATH = 'assets/levels.pack'
+
+LAYOUT_SIZE = 49
+TILE_CHARS = set('nrtmpg12345678')
+
+MAGIC = b'CLVP'
+PACK_VERSION = 1
+HEADER = struct.Struct('<4sHHI')  # magic, version, level count, index crc32
+INDEX_ENTRY = struct.Struct('<HHII')  # level, reserved, first record, record count
+CHECKSUM = struct.Struct('<I')
+
+
+def read_levels(file_path):
+    # every layout in a level file, without line endings or blank lines
+    with open(file_path, 'r') as file:
+        return [line.rstrip('\r\n') for line in file if line.strip()]
+
+
+def validate_layout(layout, where):
+    if len(layout) != LAYOUT_SIZE:
+        raise ValueError(f"{where}: expected {LAYOUT_SIZE} characters, got {len(layout)}")
+    unknown = set(layout[:-1]) - TILE_CHARS
+    if unknown:
+        raise ValueError(f"{where}: unknown tiles {''.join(sorted(unknown))!r}")
+    if layout[-1] not in '123456789':
+        raise ValueError(f"{where}: the last character must be the number of shots (1-9)")
+    if 't' not in layout[:-1]:
+        raise ValueError(f"{where}: the layout has no target")
+
+
+def compile_levels(sources, pack_path=PACK_PATH):
+    levels = []
+    for file_path in sources:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        if not name.isdigit():
+            raise ValueError(f"{file_path}: level files must be named <level number>.txt")
+        layouts = read_levels(file_path)
+        for line_number, layout in enumerate(layouts, 1):
+            validate_layout(layout, f"{file_path}:{line_number}")
+        if layouts:  # an empty file is a level that is not written yet
+            levels.append((int(name), [layout.encode('ascii') for layout in layouts]))
+    levels.sort()
+
+    index = b''
+    first = 0
+    for level, layouts in levels:
+        index += INDEX_ENTRY.pack(level, 0, first, len(layouts))
+        first += len(layouts)
+    records = [layout for _, layouts in levels for layout in layouts]
+
+    # write next to the target and swap it in, so a failed build never
+    # leaves a half written pack behind
+    temp_path = pack_path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, PACK_VERSION, len(levels), zlib.crc32(index)))
+        file.write(index)
+        file.writelines(records)
+        file.writelines(CHECKSUM.pack(zlib.crc32(record)) for record in records)
+    os.replace(temp_path, pack_path)
+
+
+class LevelPack:
+    def __init__(self, pack_path=PACK_PATH):
+        with open(pack_path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, level_count, index_crc = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != PACK_VERSION:
+            raise ValueError(f"{pack_path} is not a version {PACK_VERSION} level pack")
+        index_end = HEADER.size + level_count * INDEX_ENTRY.size
+        if zlib.crc32(self.data[HEADER.size:index_end]) != index_crc:
+            raise ValueError(f"{pack_path} has a corrupt index")
+
+        self.levels = {}
+        total = 0
+        for i in range(level_count):
+            level, _, first, count = INDEX_ENTRY.unpack_from(self.data, HEADER.size + i * INDEX_ENTRY.size)
+            self.levels[level] = (first, count)
+            total += count
+        self.records_offset = index_end
+        self.checksums_offset = index_end + total * LAYOUT_SIZE
+        if len(self.data) != self.checksums_offset + total * CHECKSUM.size:
+            raise ValueError(f"{pack_path} is truncated")
+
+    def count(self, level):
+        return self.levels[level][1]
+
+    def layout(self, level, index):
+        first, count = self.levels[level]
+        if not 0 <= index < count:
+            raise IndexError(f"level {level} has no layout {index}")
+        record = first + index
+        start = self.records_offset + record * LAYOUT_SIZE
+        layout = self.data[start:start + LAYOUT_SIZE]
+        (checksum,) = CHECKSUM.unpack_from(self.data, self.checksums_offset + record * CHECKSUM.size)
+        if zlib.crc32(layout) != checksum:
+            raise ValueError(f"level {level} layout {index} is corrupt")
+        return layout.decode('ascii')
+
+    def random_layout(self, level, rng=random):
+        return self.layout(level, rng.randrange(self.count(level)))
+
+    def close(self):
+        self.data.close()
+
+
+_level_pack = None
+_level_pack_lock = threading.Lock()
+
+
+def level_pack():
+    # opened once per process, recompiled first if a level file changed; the
+    # prefetch worker and the main thread may both get here first, and must
+    # not both write the pack
+    global _level_pack
+    with _level_pack_lock:
+        if _level_pack is None:
+            sources = glob.glob(os.path.join(LEVEL_DIR, '*.txt'))
+            if (not os.path.exists(PACK_PATH) or
+                    any(os.path.getmtime(source) > os.path.getmtime(PACK_PATH) for source in sources)):
+                compile_levels(sources)
+            _level_pack = LevelPack()
+        return _level_pack
+
+
+def _pack_with(n):
+    pack = level_pack()
+    if n not in pack.levels:
+        raise FileNotFoundError(f"Level {n} is not in {PACK_PATH}.")
+    return pack
+
+
+def pick_layout(n, rng=random):
+    # which of level n's layouts to play, apart from loading it, so the
+    # choice can stay on the thread that owns rng
+    return rng.randrange(_pack_with(n).count(n))
+
+
+def get_level(n, rng=random, index=None):
+    # layout index of level n, or one picked by rng; pass a seeded
+    # random.Random to make it repeatable
+    pack = _pack_with(n)
+    if index is None:
+        index = rng.randrange(pack.count(n))
+    return list(pack.layout(n, index))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compile level files into a level pack.')
+    parser.add_argument('files', nargs='*', help=f'level files (default: {LEVEL_DIR}/*.txt)')
+    parser.add_argument('--output', default=PACK_PATH, help='pack to write')
+    args = parser.parse_args()
+    compile_levels(args.files or glob.glob(os.path.join(LEVEL_DIR, '*.txt')), args.output)
+    pack = LevelPack(args.output)
+    print(f"{args.output}: {sum(pack.count(level) for level in pack.levels)} layouts "
+          f"in levels {sorted(pack.levels)}")
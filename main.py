@@ -1,20 +1,24 @@
+from startup import profiler  # first, so it can time the other imports
 import math
+import os
+import random
+import time
 from kivy.app import App
-from kivy.graphics import Color, Rectangle, PushMatrix, PopMatrix, Rotate, Ellipse, Line
-from kivy.core.image import Image as CoreImage
-from kivy.metrics import dp
-from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
-from kivy.uix.gridlayout import GridLayout
-from kivy.uix.label import Label
-from kivy.uix.scrollview import ScrollView
-from kivy.uix.widget import Widget
 from kivy.config import Config
 from kivy.uix.screenmanager import ScreenManager, Screen, WipeTransition
 from kivy.properties import StringProperty, NumericProperty
-from kivy.core.audio import SoundLoader
 from kivy.clock import Clock
-import random
+from levels import get_level, pick_layout
+from simulation import World, BASE_HEIGHT, COLLIDABLES, laser_path
+from graphics import BoardMesh, Camera, AimPreview, ProjectileLayer
+from ballistics import preview_points
+from profiles import get_profile_store
+from leaderboard import get_leaderboard, close_leaderboard, board_title
+from audio import create_audio
+from prefetch import LevelPrefetcher
+from instrumentation import instruments, timed
+from replay import Recorder, NullRecorder, AIM, FIRE, CYCLE, VELOCITY
 
 Config.set('graphics', 'resizable', True)
 Config.set('graphics', 'width', '1280')
@@ -22,6 +26,8 @@ Config.set('graphics', 'height', '720')
 from kivy.core.window import Window  # will mess up config if this line is written above
 
 Clock.max_iteration = 30
+profiler.mark('imports')
+profiler.watch_images()
 
 
 class MainMenuScreen(Screen):
@@ -33,19 +39,71 @@ class GameMenuScreen(Screen):
 
 
 class NewGameScreen(Screen):
-    pass
+    def on_enter(self):
+        # the first level loads while the player types a name
+        App.get_running_app().prepare_session()
+
+
+class ProfileRow(Button):
+    # one row of the load game list; the RecycleView keeps a few of these
+    # and refills them from its data as the list scrolls
+    username = StringProperty("")
+    level = NumericProperty(0)
+    score = NumericProperty(0)
 
 
 class LoadGameScreen(Screen):
-    pass
+    page_size = 50
+
+    def __init__(self, **kwargs):
+        super(LoadGameScreen, self).__init__(**kwargs)
+        self.search = ''
+        self.after = None  # last profile loaded, where the next page starts
+        self.exhausted = True
+        # typing several characters in one frame only queries once
+        self.search_trigger = Clock.create_trigger(self.reload)
+        self.ids.profile_list.bind(scroll_y=self.on_list_scroll)
+
+    def on_pre_enter(self):
+        self.ids.search.text = ''
+        self.search = ''
+        self.reload()
+
+    def on_search(self, text):
+        self.search = text.strip()
+        self.search_trigger()
+
+    def reload(self, *args):
+        self.after = None
+        self.exhausted = False
+        self.ids.profile_list.data = []
+        self.load_page()
+        self.ids.profile_list.scroll_y = 1
+        self.ids.status.text = "" if self.ids.profile_list.data else "No profiles found."
+
+    def load_page(self):
+        profiles = get_profile_store().page(self.page_size, self.after, self.search)
+        self.exhausted = len(profiles) < self.page_size
+        if profiles:
+            self.after = profiles[-1]
+        self.ids.profile_list.data.extend(
+            {'username': name, 'level': level, 'score': score} for name, level, score, _ in profiles)
+
+    def on_list_scroll(self, view, scroll_y):
+        # fetch the next page once the end of the list comes into view
+        if not self.exhausted and scroll_y <= 0.1:
+            self.load_page()
 
 
 class GameScreen(Screen):
-    level_canvas = None
-
     def __init__(self, **kwargs):
         super(GameScreen, self).__init__(**kwargs)
-        self.level_canvas = self.canvas
+        # level tiles and projectiles live in world units under this transform
+        self.camera = Camera(self.ids.level_canvas)
+        self.projectile_layer = ProjectileLayer()
+        self.ids.level_canvas.add_widget(self.projectile_layer)
+        self.aim_preview = AimPreview()
+        self.ids.level_canvas.add_widget(self.aim_preview)
 
 
 class GameWonScreen(Screen):
@@ -57,21 +115,44 @@ class GameLostScreen(Screen):
 
 
 class HallOfFameScreen(Screen):
-    primo = StringProperty("")
-    secondo = StringProperty("")
-    terzo = StringProperty("")
+    board_title = StringProperty("")
+    rows = StringProperty("")
+    page_label = StringProperty("")
+    page_size = 8
+    board_index = 0
+    page = 0
 
     def on_pre_enter(self):
+        self.board_index = 0
+        self.page = 0
         self.load_high_scores()
 
     def load_high_scores(self):
-        try:
-            with open('assets/high_scores.txt', 'r') as file:
-                self.primo = file.readline().strip()
-                self.secondo = file.readline().strip()
-                self.terzo = file.readline().strip()
-        except FileNotFoundError:
-            self.primo = "No high scores available."
+        leaderboard = get_leaderboard()
+        boards = leaderboard.board_names()
+        if not boards:
+            self.board_title = board_title('overall')
+            self.rows = "No high scores available."
+            self.page_label = ""
+            return
+
+        self.board_index %= len(boards)
+        board = boards[self.board_index]
+        pages = max(1, math.ceil(leaderboard.size(board) / self.page_size))
+        self.page = min(max(self.page, 0), pages - 1)
+        self.board_title = board_title(board)
+        self.rows = '\n'.join(f'{rank}. {username}: {score}'
+                              for rank, username, score in leaderboard.page(board, self.page, self.page_size))
+        self.page_label = f'{self.page + 1}/{pages}'
+
+    def change_board(self, step):
+        self.board_index += step
+        self.page = 0
+        self.load_high_scores()
+
+    def change_page(self, step):
+        self.page += step
+        self.load_high_scores()
 
 
 class HelpScreen(Screen):
@@ -82,145 +163,39 @@ class EndScreen(Screen):
     pass
 
 
-def get_level(n):
-    file_path = f'assets/level_data/{n}.txt'
-    try:
-        with open(file_path, 'r') as file:
-            lines = file.readlines()
-
-        random_line = random.choice(lines)
-        character_list = list(random_line)
-
-        return character_list
-
-    except FileNotFoundError:
-        raise FileNotFoundError(f"The file {file_path} does not exist.")
-    except ValueError as e:
-        raise e
-
-
-
-class Projectile(Widget):
-    def __init__(self, pos, angle, velocity, mass=0, **kwargs):
-        super().__init__(**kwargs)
-        self.pos = pos
-        self.angle = angle
-        self.velocity = velocity
-        self.mass = mass
-        self.gravity = mass * 9.81
-        self.dx = velocity * math.cos(math.radians(angle))
-        self.dy = velocity * math.sin(math.radians(angle))
-        self.time = 0
-
-    def move(self):
-        self.time += 1 / 60  # Increment time based on the frame rate
-
-        # simulate gravity
-        if self.mass > 0:
-            self.dy -= self.gravity
-
-        # Update position
-        self.x += self.dx
-        self.y += self.dy
-        self.update_graphics()
-
-        # Check if projectile is off-screen
-        if self.y < 0 or self.y > Window.height or self.x < 0 or self.x > Window.width:
-            self.remove_projectile()
-
-    def update_graphics(self):
-        # This method will be overridden by subclasses
-        pass
-
-    def remove_projectile(self):
-        # This method will be overridden by subclasses
-        pass
-
-
-class Bullet(Projectile):
-    def __init__(self, pos, angle, velocity, mass=0.1, **kwargs):
-        super().__init__(pos, angle, velocity, mass, **kwargs)
-        self.size = (dp(10), dp(10))
-        with self.canvas:
-            Color(0.2, 0.2, 0.2, 1)
-            self.ellipse = Ellipse(pos=self.pos, size=self.size)
-
-    def update_graphics(self):
-        self.ellipse.pos = (self.x, self.y)
-
-    def remove_projectile(self):
-        app = App.get_running_app()
-        if self.parent:
-            self.parent.remove_widget(self)
-            if app:
-                app.bullets.remove(self)
-
-
-class Bombshell(Projectile):
-    def __init__(self, pos, angle, velocity, mass=0.05, **kwargs):
-        super().__init__(pos, angle, velocity * 2.1, mass, **kwargs)
-        self.size = (dp(90), dp(90))  # Bombshell is bigger than bullet and laser
-        self.texture = CoreImage('assets/weapons/bombshell.png').texture
-        with self.canvas:
-            Color(1, 1, 1, 1)  # White color to display the texture correctly
-            self.rectangle = Rectangle(texture=self.texture, pos=self.pos, size=self.size)
-
-    def update_graphics(self):
-        self.rectangle.pos = (self.x, self.y)
-
-    def remove_projectile(self):
-        app = App.get_running_app()
-        if self.parent:
-            self.parent.remove_widget(self)
-            if app:
-                app.bombshells.remove(self)
-
-
-class Laser(Projectile):
-    def __init__(self, pos, angle, velocity, **kwargs):
-        super().__init__(pos, angle, velocity, 0, **kwargs)  # No gravity for laser
-        self.size = (dp(20), dp(5))
-        with self.canvas:
-            Color(1, 0, 0, 1)
-            self.line = Line(points=[self.x, self.y, self.x + self.dx, self.y + self.dy], width=dp(2))
-
-    def update_graphics(self):
-        self.line.points = [self.x, self.y, self.x + self.dx, self.y + self.dy]
-
-    def remove_projectile(self):
-        app = App.get_running_app()
-        if self.parent:
-            self.parent.remove_widget(self)
-            if app:
-                app.lasers.remove(self)
-
-    def reflect(self, mirror_orientation):
-        if mirror_orientation == 'vertical':
-            self.dx = -self.dx
-            self.angle = 180 - self.angle
-        elif mirror_orientation == 'horizontal':
-            self.dy = -self.dy
-            self.angle = -self.angle
-
-
-def reflect_laser(self, laser, collidable):
-    mirror_x, mirror_y = collidable['x'], collidable['y']
-    mirror_width, mirror_height = collidable['width'], collidable['height']
-    laser_centre_x = laser.x + laser.size[0] / 2
-    laser_centre_y = laser.y + laser.size[1] / 2
-
-    # Compute distances from the laser to the sides of the mirror
-    top_dist = mirror_y + mirror_height - laser_centre_y
-    bottom_dist = laser_centre_y - mirror_y
-    left_dist = laser_centre_x - mirror_x
-    right_dist = mirror_x + mirror_width - laser_centre_x
-
-    # Determine the closest side of the mirror to reflect accurately
-    min_dist = min(top_dist, bottom_dist, left_dist, right_dist)
-    if min_dist == top_dist or min_dist == bottom_dist:
-        laser.reflect('horizontal')
-    else:
-        laser.reflect('vertical')
+class LazyScreenManager(ScreenManager):
+    # screens are registered with a factory and built the first time they
+    # are needed; after every switch the screens likely to come next are
+    # built in the background, one per frame
+    warm_up = True
+
+    def __init__(self, **kwargs):
+        super(LazyScreenManager, self).__init__(**kwargs)
+        self.factories = {}
+        self.next_screens = {}
+        self.warm_queue = []
+        self.warm_trigger = Clock.create_trigger(self.warm_next, 0.2)
+        self.bind(current=self.queue_warm_up)
+
+    def register(self, name, factory, next_screens=()):
+        self.factories[name] = factory
+        self.next_screens[name] = next_screens
+
+    def get_screen(self, name):
+        if name in self.factories:
+            self.add_widget(self.factories.pop(name)(name=name))
+        return super(LazyScreenManager, self).get_screen(name)
+
+    def queue_warm_up(self, instance, current):
+        if self.warm_up:
+            self.warm_queue = [name for name in self.next_screens.get(current, ()) if name in self.factories]
+            self.warm_trigger()
+
+    def warm_next(self, dt):
+        if self.warm_queue:
+            self.get_screen(self.warm_queue.pop(0))
+        if self.warm_queue:
+            self.warm_trigger()
 
 
 class CannonApp(App):
@@ -232,99 +207,171 @@ class CannonApp(App):
     projectile_types = ['bullet', 'bomb', 'laser']
     current_projectile_index = 0
     muzzle_velocity = 1
+    show_aim_preview = True
+    physics_rate = 30  # fixed physics steps per second, independent of the frame rate
+    max_physics_steps = 5  # catch-up limit per frame after a stall
+    muted = bool(os.environ.get('CANNON_MUTE'))  # no audio is loaded or played
+    hud_interval = 0.5  # seconds between refreshes of the frame-time overlay
+    record_dir = os.environ.get('CANNON_RECORD')  # every game is recorded here when set
     max_shots = NumericProperty(0)
     remaining_shots = NumericProperty(0)
 
-    def __init__(self, **kwargs):
+    def __init__(self, replay=None, **kwargs):
         super(CannonApp, self).__init__(**kwargs)
         self.current_level_data = None
-        self.sounds = [
-            SoundLoader.load('assets/audio/01.wav'),
-            SoundLoader.load('assets/audio/02.wav'),
-            SoundLoader.load('assets/audio/03.wav'),
-            SoundLoader.load('assets/audio/04.wav')
-        ]
-        self.bullets = []
-        self.bombshells = []
-        self.lasers = []
+        self.world = None
+        self.board_mesh = None
+        # the layout picks of a game come from here, seeded per game; nothing
+        # else draws from it, so the seed alone decides every layout
+        self.rng = random.Random()
+        self.session_seed = None  # seed already in rng for the game about to start
+        self.recorder = NullRecorder()
+        self.replay = replay  # a replay.Recording played back instead of live input
+        self.replay_segment = 0
+        self.replay_inputs = []
+        self.audio = create_audio(self.muted)
+        self.prefetcher = LevelPrefetcher(self.physics_rate)
+        self.next_layout = None  # (level, layout index) picked ahead for the prefetcher
         self.cannon_angle = 0
+        self.physics_time = 0
+        self.hud_event = None
+        self.pointer = None  # latest mouse position not yet applied to the aim
+        self._game_screen = None
+
+    @property
+    def game_screen(self):
+        # built on first use by the screen manager, then kept
+        if self._game_screen is None:
+            self._game_screen = self.root.get_screen('game')
+        return self._game_screen
+
+    def load_kv(self, filename=None):
+        with profiler.span('kv parse'):
+            return super(CannonApp, self).load_kv(filename)
 
     def build(self):
-        sm = ScreenManager()
-        sm.add_widget(MainMenuScreen(name='menu'))
-        sm.add_widget(GameMenuScreen(name='gamemenu'))
-        sm.add_widget(NewGameScreen(name='newgame'))
-        sm.add_widget(LoadGameScreen(name='loadgame'))
-        sm.add_widget(GameScreen(name='game'))
-        sm.add_widget(HallOfFameScreen(name='hof'))
-        sm.add_widget(HelpScreen(name='help'))
-        sm.add_widget(GameWonScreen(name='gamewon'))
-        sm.add_widget(GameLostScreen(name='gamelost'))
-        sm.add_widget(EndScreen(name='ending'))
+        # only the menu is built before the first frame
+        sm = LazyScreenManager()
+        sm.register('menu', MainMenuScreen, ('gamemenu', 'hof', 'help'))
+        sm.register('gamemenu', GameMenuScreen, ('newgame', 'loadgame'))
+        sm.register('newgame', NewGameScreen, ('game',))
+        sm.register('loadgame', LoadGameScreen, ('game',))
+        sm.register('game', GameScreen, ('gamewon', 'gamelost'))
+        sm.register('hof', HallOfFameScreen)
+        sm.register('help', HelpScreen)
+        sm.register('gamewon', GameWonScreen, ('game', 'ending'))
+        sm.register('gamelost', GameLostScreen)
+        sm.register('ending', EndScreen)
+        sm.current = 'menu'
         sm.transition = WipeTransition()
 
         Window.bind(on_touch_down=self.on_mouse_click)
         Window.bind(mouse_pos=self.on_mouse_move)
         Window.bind(on_key_down=self.on_key_down)
-        Window.bind(on_resize=self.on_window_resize)
 
-        Clock.schedule_interval(self.update_projectyles, 1 / 30)  # 30 FPS
+        Clock.schedule_interval(self.update_projectyles, 0)  # every frame
+        # decode the sounds once the first frame is up
+        Clock.schedule_once(lambda dt: self.audio.preload())
+        profiler.mark('build')
+        profiler.watch_first_frame(Window)
         return sm
 
-    def on_window_resize(self, window, width, height):
-        self.redraw_level()
+    def on_start(self):
+        if self.replay:
+            self.cannon_angle = self.replay.angle
+            self.current_projectile_index = self.replay.projectile_index
+            self.muzzle_velocity = self.replay.muzzle_velocity
+            self.init_game(self.replay.username, self.replay.level, self.replay.score)
 
-    def redraw_level(self):
-        game_screen = self.root.get_screen('game')
-        # Clear only level tiles and not UI
-        game_screen.ids.level_canvas.canvas.clear()
-        self.draw_level(self.current_level_data, True)
+    def on_stop(self):
+        self.recorder.close()
+        close_leaderboard()
 
     def on_key_down(self, window, key, scancode, codepoint, modifier):
+        if self.replay and key in (32, 97, 100):
+            return  # the recording plays these
         if key == 32:  # Space bar
             self.cycle_projectile()
         elif key == 97:  # A key
             self.decrease_velocity()
         elif key == 100:  # D key
             self.increase_velocity()
+        elif key == 284:  # F3
+            self.toggle_hud()
+        elif key == 285:  # F4
+            self.export_profile()
 
     def cycle_projectile(self):
         self.current_projectile_index = (self.current_projectile_index + 1) % len(self.projectile_types)
         projectile = self.projectile_types[self.current_projectile_index]
-        self.root.get_screen('game').ids.projectile_label.text = projectile
+        self.game_screen.ids.projectile_label.text = projectile
+        self.update_aim_preview()
+        self.recorder.cycle(self.world_tick(), self.current_projectile_index)
 
     def decrease_velocity(self):
         if self.muzzle_velocity > 1:
             self.muzzle_velocity -= 1
             self.update_velocity_display()
+            self.update_aim_preview()
+            self.recorder.velocity(self.world_tick(), self.muzzle_velocity)
 
     def increase_velocity(self):
         if self.muzzle_velocity < 5:
             self.muzzle_velocity += 1
             self.update_velocity_display()
-            print(self.muzzle_velocity)
+            self.update_aim_preview()
+            self.recorder.velocity(self.world_tick(), self.muzzle_velocity)
+            instruments.debug('muzzle velocity %d', self.muzzle_velocity)
 
     def update_velocity_display(self):
-        game_screen = self.root.get_screen('game')
-        game_screen.ids.velocity_button.background_disabled_normal = f'assets/velocity/{self.muzzle_velocity}.png'
+        self.game_screen.ids.velocity_button.background_disabled_normal = f'assets/velocity/{self.muzzle_velocity}.png'
 
     def on_mouse_click(self, instance, touch):
-        if touch.button == 'left' and self.sounds:
-            sound_to_play = random.choice(self.sounds)
-            sound_to_play.play()
-            if self.root.current == 'game':
+        if touch.button == 'left':
+            self.audio.play_random()
+            if self.root.current == 'game' and not self.replay:
+                if self.pointer is not None:
+                    # a move earlier in this frame has not been aimed at yet
+                    self.apply_aim()
                 self.fire_projectyle()
 
     def on_mouse_move(self, window, pos):
+        # a fast mouse sends many of these a frame: only the last one is
+        # kept, and update_projectyles aims at it once per frame
+        self.pointer = pos
+
+    def apply_aim(self):
+        pos = self.pointer
+        self.pointer = None
         fixed_point = (0, Window.height / 2)
         mouse_x, mouse_y = pos
         angle_radians = math.atan2(mouse_y - fixed_point[1], mouse_x - fixed_point[0])
-        self.cannon_angle = math.degrees(angle_radians)
-        self.root.get_screen('game').ids.scatter.rotation = self.cannon_angle
-        print(pos, self.cannon_angle)
+        game_screen = self.game_screen
+        game_screen.ids.scatter.rotation = math.degrees(angle_radians)
+
+        # the shot is aimed in world units, whose axes the window may stretch differently
+        world_x, world_y = game_screen.camera.to_world(mouse_x, mouse_y)
+        self.cannon_angle = math.degrees(math.atan2(world_y - BASE_HEIGHT / 2, world_x))
+        self.update_aim_preview()
+        self.recorder.aim(self.world_tick(), self.cannon_angle)
+        instruments.debug('mouse %s, cannon angle %.2f', pos, self.cannon_angle)
+
+    def update_aim_preview(self):
+        preview = self.game_screen.aim_preview
+        projectile = self.projectile_types[self.current_projectile_index]
+        if not self.show_aim_preview or self.world is None:
+            preview.clear()
+        elif projectile == 'laser':
+            # same cached trace the shot itself will follow
+            preview.show_path(laser_path(self.world.board.key, self.cannon_angle).points)
+        else:
+            # a row of the precomputed arc table, clipped against the grid
+            preview.show_dots(preview_points(self.world.board, projectile, self.muzzle_velocity,
+                                             self.cannon_angle))
 
     def fire_projectyle(self):
         if self.remaining_shots > 0:
+            self.recorder.fire(self.world_tick())
             if self.current_projectile_index == 0:
                 self.fire_bullet()
             elif self.current_projectile_index == 1:
@@ -334,207 +381,145 @@ class CannonApp(App):
 
             # Decrease remaining shots and update label
             self.remaining_shots -= 1
-            self.root.get_screen('game').ids.shots_label.text = f"Shots: {self.remaining_shots}/{self.max_shots}"
+            self.game_screen.ids.shots_label.text = f"Shots: {self.remaining_shots}/{self.max_shots}"
         else:
             self.root.current = 'gamelost'
 
     def fire_bullet(self):
-        cannon_pos = (0, Window.height / 2)  # Starting position of the cannon
-        bullet_velocity = 20 * self.muzzle_velocity  # Calculate velocity based on the current muzzle_velocity
-        bullet = Bullet(pos=cannon_pos, angle=self.cannon_angle, velocity=bullet_velocity)
-        game_screen = self.root.get_screen('game')
-        scatter_index = game_screen.children.index(game_screen.ids.scatter)
-        game_screen.add_widget(bullet, index=scatter_index + 1)
-        self.bullets.append(bullet)
+        self.world.fire(self.cannon_angle, self.muzzle_velocity, 'bullet')
 
     def fire_bombshell(self):
-        cannon_pos = (0, Window.height / 2)
-        bombshell_velocity = 10 * self.muzzle_velocity
-        bombshell = Bombshell(pos=cannon_pos, angle=self.cannon_angle, velocity=bombshell_velocity)
-        game_screen = self.root.get_screen('game')
-        scatter_index = game_screen.children.index(game_screen.ids.scatter)
-        game_screen.add_widget(bombshell, index=scatter_index + 1)
-        self.bombshells.append(bombshell)
+        self.world.fire(self.cannon_angle, self.muzzle_velocity, 'bomb')
 
     def fire_laser(self):
-        cannon_pos = (0, Window.height / 2)
-        laser_velocity = 50
-        laser = Laser(pos=cannon_pos, angle=self.cannon_angle, velocity=laser_velocity)
-        game_screen = self.root.get_screen('game')
-        scatter_index = game_screen.children.index(game_screen.ids.scatter)
-        game_screen.add_widget(laser, index=scatter_index + 1)
-        self.lasers.append(laser)
+        self.world.fire(self.cannon_angle, self.muzzle_velocity, 'laser')
 
+    @timed('frame')
     def update_projectyles(self, dt):
-        # Combine all projectiles into a single list
-        all_projectiles = self.bullets + self.bombshells + self.lasers
-
-        for p in all_projectiles:
-            p.move()
-            self.check_collisions(p)
-
-    def check_collisions(self, projectile):
-        for collidable in self.collidables:
-            if self.is_colliding(projectile, collidable):
-                self.handle_collision(projectile, collidable)
-
-    def is_colliding(self, projectile, collidable):
-        px, py = projectile.x, projectile.y
-        if projectile in self.bullets:
-            pw, ph = 10, 10
-        elif projectile in self.bombshells:
-            pw, ph = 90, 90
-        elif projectile in self.lasers:
-            pw, ph = 5, 5
-        else:
-            pw, ph = 0, 0
-
-        cx, cy = collidable['x'], collidable['y']
-        cw, ch = collidable['width'], collidable['height']
-
-        # collision detection
-        if (px < cx + cw and
-                px + pw > cx and
-                py < cy + ch and
-                py + ph > cy):
-            return True
-
-    def handle_collision(self, projectile, collidable):
-        if collidable.get('type') == 't':
-            if not self.game_won_called:
-                self.game_won()
-                self.game_won_called = True
+        if instruments.enabled:
+            instruments.record('frame interval', dt)
+        if self.world is None:
             return
-        if isinstance(projectile, Bullet):
-            if collidable.get('type') == 'r':
-                self.current_level_data[collidable.get('coord')] = 'n'
-                self.redraw_level()
-            projectile.remove_projectile()
-        elif isinstance(projectile, Bombshell):
-            if collidable.get('type') == 'r':
-                self.current_level_data[collidable.get('coord')] = 'n'
-                self.redraw_level()
-            self.bomb_explosion_collisions(projectile)
-            projectile.remove_projectile()
-        elif isinstance(projectile, Laser):
-            if collidable.get('type') == 'm':
-                self.reflect_laser(projectile, collidable)
-            else:
-                projectile.remove_projectile()
-
-    def reflect_laser(self, laser, collidable):
-        mirror_x, mirror_y = collidable['x'], collidable['y']
-        mirror_width, mirror_height = collidable['width'], collidable['height']
-        laser_centre_x = laser.x + 2.5
-        laser_centre_y = laser.y + 2.5
-        top = mirror_y + mirror_height - laser_centre_y
-        bottom = laser_centre_y - mirror_y
-        left = laser_centre_x - mirror_x
-        right = mirror_x + mirror_width - laser_centre_x
-        # calculates which side of the mirror is hit
-        if top < left and right or bottom < left and right:
-            laser.reflect('horizontal')
-        else:
-            laser.reflect('vertical')
-
-    def bomb_explosion_collisions(self, projectile):
-        for collidable in self.collidables:
-            if self.is_exploding(projectile, collidable):
-                self.handle_explosion(collidable)
-
-    def is_exploding(self, projectile, collidable):  # collision detection for bomb explosion radius
-        radius = ((0.75 * Window.width) / 8 + Window.height / 6) / 2
-        px, py = projectile.x - radius + 90, projectile.y - radius + 90
-        pw, ph = 2 * radius, 2 * radius
-
-        cx, cy = collidable['x'], collidable['y']
-        cw, ch = collidable['width'], collidable['height']
-
-        if (px < cx + cw and
-                px + pw > cx and
-                py < cy + ch and
-                py + ph > cy):
-            return True
-
-    def handle_explosion(self, collidable):
-        if collidable.get('type') == 'r':
-            self.current_level_data[collidable.get('coord')] = 'n'
-            self.redraw_level()
+        if self.pointer is not None and not self.replay and self.root.current == 'game':
+            self.apply_aim()
+
+        # run as many fixed physics steps as the elapsed time calls for
+        step_time = 1 / self.physics_rate
+        self.physics_time += dt
+        steps = 0
+        while self.physics_time >= step_time:
+            if steps == self.max_physics_steps:
+                # too far behind to catch up: drop the backlog instead of spiralling
+                self.physics_time %= step_time
+                break
+            if self.replay:
+                self.apply_replay_inputs()
+            self.handle_events(self.world.step())
+            self.physics_time -= step_time
+            steps += 1
+        if self.board_mesh.dirty:
+            # every tile destroyed this frame reaches the GPU in one upload
+            self.board_mesh.flush()
+            self.update_aim_preview()
+
+        # draw in between the last two physics states, every projectile of
+        # a type in one mesh
+        alpha = self.physics_time / step_time
+        self.game_screen.projectile_layer.update(self.world.store, alpha)
+
+    def world_tick(self):
+        # the physics tick an input lands on: it applies before that step
+        return self.world.tick if self.world is not None else 0
+
+    def apply_replay_inputs(self):
+        inputs = self.replay_inputs
+        while inputs and inputs[0].tick <= self.world.tick:
+            event = inputs.pop(0)
+            if event.kind == AIM:
+                self.cannon_angle = event.value
+                self.game_screen.ids.scatter.rotation = event.value
+                self.update_aim_preview()
+            elif event.kind == CYCLE:
+                self.current_projectile_index = event.value - 1
+                self.cycle_projectile()
+            elif event.kind == VELOCITY:
+                self.muzzle_velocity = event.value
+                self.update_velocity_display()
+                self.update_aim_preview()
+            elif event.kind == FIRE:
+                self.fire_projectyle()
 
-    def game_won(self):
+    def toggle_hud(self):
+        # the overlay also switches the timing spans on while it is shown
+        hud = self.game_screen.ids.hud
+        if self.hud_event is None:
+            instruments.enabled = True
+            hud.opacity = 1
+            self.hud_event = Clock.schedule_interval(self.update_hud, self.hud_interval)
+            self.update_hud(0)
+        else:
+            self.hud_event.cancel()
+            self.hud_event = None
+            hud.opacity = 0
+            hud.text = ''
+            instruments.enabled = bool(os.environ.get('CANNON_PROFILE'))
+
+    def update_hud(self, dt):
+        lines = [f"{'':<15}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for name in ('frame interval', 'frame', 'tick', 'sweep', 'collision'):
+            stats = instruments.stats(name)
+            if stats:
+                lines.append(f"{name:<15}{stats['p50']:7.2f}{stats['p95']:7.2f}{stats['p99']:7.2f} ms")
+        if self.world is not None:
+            collidables = sum(self.world.board.cells.count(ord(c)) for c in COLLIDABLES)
+            lines.append(f"projectiles {len(self.world.store)}, collidables {collidables}")
+        self.game_screen.ids.hud.text = '\n'.join(lines)
+
+    def export_profile(self):
+        instruments.export_json('profile.json')
+        instruments.export_csv('profile.csv')
+        instruments.debug('timing spans written to profile.json and profile.csv')
+
+    def handle_events(self, events):
+        for event in events:
+            if event.kind == 'target':
+                if not self.game_won_called:
+                    self.game_won(event.projectile.type)
+                    self.game_won_called = True
+            elif event.kind == 'destroyed':
+                self.board_mesh.remove_tile(event.coord)
+
+    def clear_projectiles(self):
+        self.game_screen.projectile_layer.clear()
+
+    def game_won(self, projectile_type=None):
         self.current_level += 1
+        level_points = ((self.remaining_shots * 10) + 10) * 10 * self.current_level
+        get_leaderboard().record(self.current_username, level_points, self.current_level, projectile_type)
         if self.current_level == 4:
             self.the_end()
             return
-        self.current_score = self.current_score + ((self.remaining_shots * 10) + 10) * 10 * self.current_level
+        self.current_score = self.current_score + level_points
+        # load the next level while the win screen is up
+        self.prefetch_level(self.current_level)
+        if self.replay and self.replay_segment < len(self.replay.segments):
+            Clock.schedule_once(lambda dt: self.continue_playing(), 1.5)
         self.root.get_screen('gamewon').ids.score_label.text = f'You won! Score: {self.current_score}'
         self.root.current = 'gamewon'
 
     def continue_playing(self):
-        self.init_game(self.current_username, self.current_level, self.current_score)
+        self.init_game(self.current_username, self.current_level, self.current_score, new_session=False)
 
     def save_and_quit(self):
-        new_profile_line = f"{self.current_username}%{self.current_level}%{self.current_score}\n"
-
-        # Read the existing profiles
-        try:
-            with open('assets/profiles.txt', 'r') as file:
-                lines = file.readlines()
-        except FileNotFoundError:
-            lines = []
-
-        # Remove the existing profile for the same username if it exists
-        lines = [line for line in lines if not line.startswith(f"{self.current_username}%")]
-
-        # Insert the new profile line
-        lines.insert(0, new_profile_line)
-
-        # Write the updated profile list back to the file
-        with open('assets/profiles.txt', 'w') as file:
-            file.writelines(lines)
-
+        # replaces any earlier save under the same username
+        get_profile_store().save(self.current_username, self.current_level, self.current_score)
         self.switch_to_menu()
 
     def the_end(self):
         self.root.get_screen('ending').ids.end_label.text = f'You won the game! Final score: {self.current_score}'
-        self.update_hof(self.current_username, self.current_score)
+        get_leaderboard().record(self.current_username, self.current_score)
         self.root.current = 'ending'
 
-    def update_hof(self, username, score):
-        hof_file = 'assets/high_scores.txt'
-
-        try:
-            with open(hof_file, 'r') as file:
-                lines = file.readlines()
-        except FileNotFoundError:
-            lines = []
-
-        # put existing scores into a list of tuples (score, username)
-        scores = []
-        for line in lines:
-            line = line.strip()
-            if line:
-                name, score_str = line.rsplit(': ', 1)
-                try:
-                    score_value = int(score_str)
-                    scores.append((score_value, name))
-                except ValueError:
-                    continue
-
-        # Add the new score to the list
-        scores.append((score, username))
-
-        # Sort the scores highest score first
-        scores.sort(reverse=True, key=lambda x: x[0])
-
-        # Keep only the top 3 scores
-        top_scores = scores[:3]
-
-        # Write the top 3 scores back to the file
-        with open(hof_file, 'w') as file:
-            for score, name in top_scores:
-                file.write(f'{name}: {score}\n')
-
     def switch_to_gamemenu(self):
         self.root.current = 'gamemenu'
 
@@ -555,58 +540,6 @@ class CannonApp(App):
 
     def load_game(self):
         self.root.current = 'loadgame'
-        self.load_profiles()
-
-    def load_profiles(self):
-        load_screen = self.root.get_screen('loadgame')
-
-        # Clear existing widgets in load_screen
-        load_screen.clear_widgets()
-
-        # Create ScrollView
-        scroll_view = ScrollView(size_hint=(1, 1), do_scroll_x=False, do_scroll_y=True)
-
-        # Create a BoxLayout for vertical orientation
-        main_layout = BoxLayout(orientation='vertical', size_hint_y=None)
-        main_layout.bind(minimum_height=main_layout.setter('height'))
-
-        spacer = Widget(size_hint_y=None, height=80)
-
-        # Create GridLayout
-        layout = GridLayout(cols=1, spacing=100, size_hint_y=None)
-        layout.bind(minimum_height=layout.setter('height'))
-
-        try:
-            with open('assets/profiles.txt', 'r') as file:
-                lines = file.readlines()
-
-            for line in lines:
-                name, levels_completed, score = line.strip().split('%')
-                load_button = Button(
-                    text=f'Load {name}: {levels_completed} Levels Completed, Score: {score}',
-                    size_hint_y=None,
-                    height=50,
-                    font_size=0.03 * self.root.width,
-                    font_name='assets/SuperMario256.ttf',
-                    background_normal='assets/X_bg_up.png',
-                    background_color=[1, 1, 1, 1],
-                    on_release=lambda btn, n=name, l=int(levels_completed), s=int(score): self.init_game(n, l, s)
-                )
-                layout.add_widget(load_button)
-
-        except FileNotFoundError:
-            error_label = Label(text="No profiles found.", font_size='20sp')
-            layout.add_widget(error_label)
-
-        # Add the spacer and GridLayout to the BoxLayout
-        main_layout.add_widget(spacer)
-        main_layout.add_widget(layout)
-
-        # Add the BoxLayout to the ScrollView
-        scroll_view.add_widget(main_layout)
-
-        # Add ScrollView to the screen
-        load_screen.add_widget(scroll_view)
 
     def init_new_game(self):
         profile_name = self.root.get_screen('newgame').ids.input.text
@@ -616,7 +549,9 @@ class CannonApp(App):
         else:
             return self.new_game()
 
-    def init_game(self, username, lvl, score):
+    def init_game(self, username, lvl, score, new_session=True):
+        if new_session:
+            self.start_session(username, lvl, score)
         self.game_won_called = False
         self.root.current = 'game'
         self.current_score = score
@@ -624,87 +559,80 @@ class CannonApp(App):
         self.current_username = username
         self.level(lvl)
 
-    def draw_level(self, leveldata, redrawing=False):
+    @timed('draw_level')
+    def draw_level(self, leveldata, world=None, board_mesh=None):
         self.current_level_data = leveldata
-        self.collidables = []
-        t_found = False
-
-        # Get the current window size and calculate scale factors
-        window_width, window_height = Window.size
-        base_width, base_height = 1920, 1080
-        scale_x = window_width / base_width
-        scale_y = window_height / base_height
-
-        # Set tile size based on scaling factors
-        tile_width = 180 * scale_x
-        tile_height = 180 * scale_y
-        base_x_pos = 480 * scale_x
-        base_y_pos = 0 * scale_y
-
-        # Texture mappings
-        textures = {
-            'r': 'assets/tiles/rock.png',
-            'm': 'assets/tiles/mirror.png',
-            't': 'assets/tiles/target.png',
-            'p': 'assets/tiles/perpetio.png',
-            'g': 'assets/tiles/gravitonio.png',
-            '1': 'assets/tiles/wormhole_orange.png',
-            '2': 'assets/tiles/wormhole_orange.png',
-            '3': 'assets/tiles/wormhole_orange.png',
-            '4': 'assets/tiles/wormhole_orange.png',
-            '5': 'assets/tiles/wormhole_blue.png',
-            '6': 'assets/tiles/wormhole_blue.png',
-            '7': 'assets/tiles/wormhole_blue.png',
-            '8': 'assets/tiles/wormhole_blue.png'
-
-        }
-
-        # Access level drawing canvas
-        game_screen = self.root.get_screen('game')
-        level_canvas = game_screen.ids.level_canvas.canvas
-        level_canvas.clear()
-
-        # iterating through level data to draw each tile
-        for i in range(48):
-            x_pos = base_x_pos + ((i % 8) * tile_width)
-            y_pos = base_y_pos + ((i // 8) * tile_height)
-
-            element = leveldata[i]
-
-            if element == 'n':
-                continue
-
-            if element == 't':
-                if t_found:
-                    element = 'n'
-                else:
-                    t_found = True
-
-            if element in textures:
-                level_canvas.add(Color(1, 1, 1, 1))  # Set the color
-                texture = CoreImage(textures[element]).texture
-                level_canvas.add(Rectangle(texture=texture, pos=(x_pos, y_pos), size=(tile_width, tile_height)))
-
-                if element in 'rtmp':  # the collidables: rock, target, mirror, perpetio
-                    self.collidables.append({
-                        'type': element,
-                        'x': x_pos,
-                        'y': y_pos,
-                        'width': tile_width,
-                        'height': tile_height,
-                        'coord': i
-                    })
-
-        if leveldata and not redrawing:  # makes sure remaining shots are not reset when redrawing a level
-            max_shots_char = leveldata[48]
-            if max_shots_char.isdigit():
-                self.max_shots = int(max_shots_char)
-                self.remaining_shots = self.max_shots
-                self.root.get_screen('game').ids.shots_label.text = f"Shots: {self.remaining_shots}/{self.max_shots}"
+        self.clear_projectiles()
+        self.world = world or World(leveldata, self.physics_rate)
+        self.physics_time = 0
+        board = self.world.board
+
+        # the whole board is a single mesh textured from the tile atlas; only
+        # the previous one is swapped out, clearing the canvas would also
+        # detach the projectile layer and the aim preview drawn above it
+        level_canvas = self.game_screen.ids.level_canvas.canvas
+        if self.board_mesh is not None:
+            level_canvas.remove(self.board_mesh)
+        self.board_mesh = board_mesh or BoardMesh(board)
+        level_canvas.insert(0, self.board_mesh)
+        self.update_aim_preview()
+
+        self.max_shots = board.max_shots
+        self.remaining_shots = self.max_shots
+        self.game_screen.ids.shots_label.text = f"Shots: {self.remaining_shots}/{self.max_shots}"
+
+    def prepare_session(self):
+        # the new game screen is up: seed the game now, so its first layout is
+        # picked from that seed and loads while the player types a name
+        self.session_seed = random.getrandbits(63)
+        self.rng.seed(self.session_seed)
+        self.prefetch_level(0)
+
+    def start_session(self, username, lvl, score):
+        # a new seed for every game, unless prepare_session already drew it;
+        # with record_dir set the game is written to a log that replay.py can
+        # play back
+        self.recorder.close()
+        self.recorder = NullRecorder()
+        prepared = not self.replay and lvl == 0 and self.session_seed is not None
+        if prepared:
+            seed = self.session_seed
+        else:
+            seed = self.replay.seed if self.replay else random.getrandbits(63)
+            self.rng.seed(seed)
+            self.next_layout = None  # picked from another seed
+        self.session_seed = None
+        if self.record_dir and not self.replay:
+            os.makedirs(self.record_dir, exist_ok=True)
+            path = os.path.join(self.record_dir, time.strftime('%Y%m%d-%H%M%S') + '.crpl')
+            controls = (self.cannon_angle, self.current_projectile_index, self.muzzle_velocity)
+            self.recorder = Recorder(path, seed, self.physics_rate, username, lvl, score, controls)
+
+    def prefetch_level(self, n):
+        # the layout is picked here on the main thread, in the order the game
+        # picks them; the prefetcher's worker only loads it
+        self.next_layout = (n, pick_layout(n + 1, self.rng))
+        self.prefetcher.prefetch(*self.next_layout)
 
     def level(self, n):
-        leveldata = get_level(n + 1)
-        self.draw_level(leveldata)
+        if self.replay:
+            # the recorded layout, whatever the RNG or the level files say now
+            segment = self.replay.segments[self.replay_segment]
+            self.replay_segment += 1
+            self.replay_inputs = list(segment.inputs)
+            self.draw_level(segment.layout)
+            return
+        if self.next_layout is not None and self.next_layout[0] == n:
+            layout = self.next_layout[1]
+        else:
+            layout = pick_layout(n + 1, self.rng)
+        self.next_layout = None
+        prefetched = self.prefetcher.take(n, layout)
+        if prefetched:
+            self.draw_level(*prefetched)
+        else:
+            self.draw_level(get_level(n + 1, index=layout))
+        self.recorder.level(n, self.current_level_data)
 
 
 if __name__ == '__main__':
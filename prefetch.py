@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from kivy.clock import Clock
+
+from graphics import BoardMesh
+from levels import get_level
+from simulation import World
+
+# Loads a level before the player asks for it: the layout is read and the
+# World built on a worker thread, then the board mesh (and the tile atlas
+# the first time) is built back on the main thread through the Clock, so
+# starting the level only has to put it on the canvas. Which layout to load
+# is picked by the caller, on the main thread: the worker never touches the
+# game's RNG.
+
+
+class LevelPrefetcher:
+    def __init__(self, tick_rate):
+        self.tick_rate = tick_rate
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.futures = {}  # (level index, layout index) -> Future of (leveldata, world)
+        self.meshes = {}  # (level index, layout index) -> BoardMesh built for that world
+
+    def load(self, n, layout):
+        leveldata = get_level(n + 1, index=layout)
+        return leveldata, World(leveldata, self.tick_rate)
+
+    def prefetch(self, n, layout):
+        key = (n, layout)
+        if key in self.futures:
+            return
+        future = self.executor.submit(self.load, n, layout)
+        self.futures[key] = future
+        future.add_done_callback(lambda f: Clock.schedule_once(lambda dt: self.warm(key, f)))
+
+    def warm(self, key, future):
+        # main thread: graphics instructions cannot be built on the worker
+        if self.futures.get(key) is not future or future.exception() is not None:
+            return
+        self.meshes[key] = BoardMesh(future.result()[1].board)
+
+    def take(self, n, layout):
+        # (leveldata, world, board mesh or None) for that layout of level n,
+        # waiting for the worker if it is still busy, or None if it was never
+        # prefetched; whatever else was prefetched is dropped
+        future = self.futures.pop((n, layout), None)
+        mesh = self.meshes.pop((n, layout), None)
+        self.futures.clear()
+        self.meshes.clear()
+        if future is None or future.exception() is not None:
+            return None
+        leveldata, world = future.result()
+        return leveldata, world, mesh
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+# Saved games, one row per username in an SQLite database in WAL mode: a save
+# is a single upsert and the load screen reads one page at a time along the
+# last-played index, however many players share the install.
+
+DB_PATH = 'assets/profiles.db'
+LEGACY_PATH = 'assets/profiles.txt'  # name%level%score per line, newest first
+
+Profile = namedtuple('Profile', 'username level score last_played')
+
+
+class ProfileStore:
+    def __init__(self, path=DB_PATH, legacy_path=LEGACY_PATH):
+        self.db = sqlite3.connect(path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        with self.db:
+            self.db.execute('CREATE TABLE IF NOT EXISTS profiles ('
+                            'username TEXT PRIMARY KEY, level INTEGER NOT NULL, '
+                            'score INTEGER NOT NULL, last_played REAL NOT NULL)')
+            self.db.execute('CREATE INDEX IF NOT EXISTS profiles_last_played '
+                            'ON profiles (last_played DESC, username)')
+            self.db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self.migrate(legacy_path)
+
+    def migrate(self, legacy_path):
+        # one-time import of the old text file, keeping its newest-first order
+        if self.db.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone():
+            return
+        rows = []
+        if os.path.exists(legacy_path):
+            now = time.time()
+            with open(legacy_path, 'r') as file:
+                lines = [line.strip() for line in file if line.strip()]
+            for i, line in enumerate(lines):
+                try:
+                    # level and score are the last two fields, so a % in a name survives
+                    username, level, score = line.rsplit('%', 2)
+                    rows.append((username, int(level), int(score), now - i))
+                except ValueError:
+                    continue
+        with self.db:
+            self.db.executemany('INSERT OR IGNORE INTO profiles VALUES (?, ?, ?, ?)', rows)
+            self.db.execute("INSERT INTO meta VALUES ('migrated', ?)", (legacy_path,))
+
+    def save(self, username, level, score):
+        with self.db:
+            self.db.execute('INSERT INTO profiles VALUES (?, ?, ?, ?) '
+                            'ON CONFLICT (username) DO UPDATE SET level = excluded.level, '
+                            'score = excluded.score, last_played = excluded.last_played',
+                            (username, level, score, time.time()))
+
+    def page(self, limit, after=None, search=''):
+        # up to limit profiles, most recently played first; pass the last
+        # profile of a page as after to get the next one, and search to keep
+        # only usernames containing it (case-insensitive)
+        conditions, params = [], []
+        if after is not None:
+            conditions.append('(last_played < ? OR (last_played = ? AND username > ?))')
+            params += [after.last_played, after.last_played, after.username]
+        if search:
+            escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            conditions.append("username LIKE ? ESCAPE '\\'")
+            params.append(f'%{escaped}%')
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ''
+        rows = self.db.execute(f'SELECT * FROM profiles {where}'
+                               'ORDER BY last_played DESC, username LIMIT ?', params + [limit])
+        return [Profile(*row) for row in rows]
+
+    def close(self):
+        self.db.close()
+
+
+_profile_store = None
+
+
+def get_profile_store():
+    # opened on first use and then shared
+    global _profile_store
+    if _profile_store is None:
+        _profile_store = ProfileStore()
+    return _profile_store
@@ -0,0 +1,228 @@
+import argparse
+import random
+import struct
+import sys
+from collections import namedtuple
+from time import perf_counter
+
+from levels import get_level, pick_layout
+from simulation import World, PROJECTILE_TYPES
+
+# Session recording. A log starts with the RNG seed and the player's starting
+# point, then holds one record per level started (with the exact layout the
+# RNG picked) and per input that changes the game: aim, fire, projectile
+# cycle and muzzle velocity. Inputs are stamped with the physics tick they
+# apply before, so feeding them back to a World at the same ticks replays
+# the session exactly, with or without the game on screen.
+#
+# The recorded layouts are authoritative. The seed only decides which layout
+# each level start picks from the level files (one draw per level, and
+# nothing else draws from the game's RNG), so after the files are edited the
+# seed no longer gives the same boards; replays always use the layouts in
+# the log. seed_matches() tells whether the seed still reproduces them.
+#
+#   python replay.py session.crpl               # as fast as possible, headless
+#   python replay.py session.crpl --repeat 50   # the same, as a load test
+#   python replay.py session.crpl --watch       # in the game, in real time
+
+MAGIC = b'CRPL'
+VERSION = 1
+# magic, version, tick rate, seed, level, score, then the controls as the
+# session found them: angle, projectile index, muzzle velocity; name length
+HEADER = struct.Struct('<4sBHQHIdBBB')
+
+LEVEL, AIM, FIRE, CYCLE, VELOCITY = range(1, 6)
+RECORDS = {
+    LEVEL: struct.Struct('<BH49s'),  # level index, layout
+    AIM: struct.Struct('<BId'),  # tick, angle
+    FIRE: struct.Struct('<BI'),  # tick
+    CYCLE: struct.Struct('<BIB'),  # tick, projectile index
+    VELOCITY: struct.Struct('<BIB'),  # tick, muzzle velocity
+}
+
+Input = namedtuple('Input', 'kind tick value')
+Segment = namedtuple('Segment', 'level layout inputs')  # one level as played
+
+
+class Recorder:
+    def __init__(self, path, seed, tick_rate, username, level, score, controls):
+        self.file = open(path, 'wb')
+        name = username.encode('utf-8')[:255]
+        self.file.write(HEADER.pack(MAGIC, VERSION, tick_rate, seed, level, score, *controls, len(name)) + name)
+        self.pending_aim = None  # only the last aim of a tick is written
+
+    def write(self, kind, *fields):
+        self.file.write(RECORDS[kind].pack(kind, *fields))
+
+    def flush_aim(self):
+        if self.pending_aim is not None:
+            self.write(AIM, *self.pending_aim)
+            self.pending_aim = None
+
+    def level(self, level, leveldata):
+        self.flush_aim()
+        self.write(LEVEL, level, ''.join(leveldata[:49]).encode('ascii'))
+        self.file.flush()
+
+    def aim(self, tick, angle):
+        if self.pending_aim is not None and self.pending_aim[0] != tick:
+            self.flush_aim()
+        self.pending_aim = (tick, angle)
+
+    def fire(self, tick):
+        self.flush_aim()
+        self.write(FIRE, tick)
+
+    def cycle(self, tick, projectile_index):
+        self.flush_aim()
+        self.write(CYCLE, tick, projectile_index)
+
+    def velocity(self, tick, muzzle_velocity):
+        self.flush_aim()
+        self.write(VELOCITY, tick, muzzle_velocity)
+
+    def close(self):
+        self.flush_aim()
+        self.file.close()
+
+
+class NullRecorder:
+    # not recording: inputs are dropped
+    def level(self, level, leveldata):
+        pass
+
+    def aim(self, tick, angle):
+        pass
+
+    def fire(self, tick):
+        pass
+
+    def cycle(self, tick, projectile_index):
+        pass
+
+    def velocity(self, tick, muzzle_velocity):
+        pass
+
+    def close(self):
+        pass
+
+
+class Recording:
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            data = file.read()
+        magic, version, self.tick_rate, self.seed, self.level, self.score, \
+            self.angle, self.projectile_index, self.muzzle_velocity, name_length = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} recording")
+        offset = HEADER.size
+        self.username = data[offset:offset + name_length].decode('utf-8')
+        offset += name_length
+
+        self.segments = []
+        while offset < len(data):
+            kind = data[offset]
+            record = RECORDS.get(kind)
+            if record is None or offset + record.size > len(data):
+                break  # cut off, the rest of the session was not written
+            fields = record.unpack_from(data, offset)[1:]
+            offset += record.size
+            if kind == LEVEL:
+                self.segments.append(Segment(fields[0], list(fields[1].decode('ascii')), []))
+            elif self.segments:
+                self.segments[-1].inputs.append(Input(kind, fields[0], fields[1] if len(fields) > 1 else None))
+
+
+class InputState:
+    # what the player's inputs have set up so far, applied to a World
+    def __init__(self, recording):
+        self.angle = recording.angle
+        self.projectile_index = recording.projectile_index
+        self.muzzle_velocity = recording.muzzle_velocity
+
+    def apply(self, world, event):
+        if event.kind == AIM:
+            self.angle = event.value
+        elif event.kind == CYCLE:
+            self.projectile_index = event.value
+        elif event.kind == VELOCITY:
+            self.muzzle_velocity = event.value
+        elif event.kind == FIRE:
+            world.fire(self.angle, self.muzzle_velocity, PROJECTILE_TYPES[self.projectile_index])
+
+
+def replay_segment(segment, tick_rate, state, settle_ticks=None):
+    # run one level's inputs at their ticks, then until nothing is in flight;
+    # returns the World and every event it produced
+    world = World(segment.layout, tick_rate)
+    settle_ticks = settle_ticks or 10 * tick_rate
+    events = []
+    inputs = segment.inputs
+    i = 0
+    idle = 0
+    while i < len(inputs) or (world.projectiles and idle < settle_ticks):
+        while i < len(inputs) and inputs[i].tick <= world.tick:
+            state.apply(world, inputs[i])
+            i += 1
+        events += world.step()
+        if i == len(inputs):
+            idle += 1
+    return world, events
+
+
+def replay(recording):
+    state = InputState(recording)
+    summary = []
+    for segment in recording.segments:
+        world, events = replay_segment(segment, recording.tick_rate, state)
+        kinds = [event.kind for event in events]
+        summary.append({'level': segment.level, 'ticks': world.tick,
+                        'shots': sum(1 for event in segment.inputs if event.kind == FIRE),
+                        'won': 'target' in kinds, 'destroyed': kinds.count('destroyed')})
+    return summary
+
+
+def seed_matches(recording):
+    # whether the level files still give the recorded layouts for the seed
+    rng = random.Random(recording.seed)
+    for segment in recording.segments:
+        try:
+            layout = get_level(segment.level + 1, index=pick_layout(segment.level + 1, rng))
+        except (FileNotFoundError, IndexError, ValueError):
+            return False
+        if layout != segment.layout:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a recorded session.')
+    parser.add_argument('recording', help='a .crpl file written with CANNON_RECORD set')
+    parser.add_argument('--watch', action='store_true', help='replay in the game, in real time')
+    parser.add_argument('--repeat', type=int, default=1, help='headless replays to run')
+    args = parser.parse_args()
+
+    recording = Recording(args.recording)
+    if not seed_matches(recording):
+        print(f"note: the level files changed since {args.recording} was recorded, "
+              f"its seed no longer picks the recorded layouts; replaying those")
+    if args.watch:
+        from main import CannonApp
+        CannonApp(replay=recording).run()
+        return 0
+
+    start = perf_counter()
+    for _ in range(args.repeat):
+        summary = replay(recording)
+    seconds = perf_counter() - start
+    for level in summary:
+        print(f"level {level['level'] + 1}: {level['shots']} shots, {level['destroyed']} tiles destroyed, "
+              f"{'won' if level['won'] else 'not won'} after {level['ticks']} ticks")
+    ticks = args.repeat * sum(level['ticks'] for level in summary)
+    print(f"{args.repeat} replay(s) of {recording.username!r} (seed {recording.seed}): "
+          f"{ticks} ticks in {seconds:.2f} s, {ticks / max(seconds, 1e-9):.0f} ticks/s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,636 @@
+import math
+from bisect import bisect_right
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from instrumentation import timed
+
+# Kivy-free physics for the cannon game: the app drives a World every tick,
+# tools can call simulate_shot() without ever opening a window.
+
+# everything here is in world units, the 1920x1080 design resolution of the
+# level layouts; the app maps them onto the window with a camera transform
+BASE_WIDTH, BASE_HEIGHT = 1920, 1080
+COLUMNS, ROWS = 8, 6
+TILE_SIZE = 180
+BOARD_X, BOARD_Y = 480, 0
+BLAST_RADIUS = 180
+
+# speeds and gravity are tuned per tick at this rate; a World stepping at a
+# different rate moves along the same parabolas, through the same positions
+# at every base tick
+BASE_TICK_RATE = 30
+
+# most tiles a projectile can reach within one step, and the slack below
+# which a swept box is only grazing a tile it is leaving
+MAX_SWEEP_HITS = 8
+SWEEP_EPSILON = 1e-9
+
+MAX_LASER_BOUNCES = 16  # a laser caught between mirrors is absorbed after this many
+
+COLLIDABLES = 'rtmp'  # rock, target, mirror, perpetio
+# lookup table indexed by the byte stored in Board.cells
+IS_COLLIDABLE = bytes(1 if chr(code) in COLLIDABLES else 0 for code in range(256))
+
+PROJECTILE_TYPES = ['bullet', 'bomb', 'laser']
+LASER = PROJECTILE_TYPES.index('laser')
+
+# hitbox side and mass of every projectile type
+PROJECTILES = {
+    'bullet': {'size': 10, 'mass': 0.1},
+    'bomb': {'size': 90, 'mass': 0.05},
+    'laser': {'size': 5, 'mass': 0},
+}
+
+Event = namedtuple('Event', 'tick kind projectile coord')
+
+
+def sweep_tile(x, y, move_x, move_y, size, tile_x, tile_y):
+    # first time in [0, 1) at which a size x size box at (x, y) moving by
+    # (move_x, move_y) overlaps the tile, and the axis of the face it enters
+    # through ('x' for a vertical face); None when the move never overlaps it
+    enter, leave = -math.inf, math.inf
+    axis = None
+    for start, move, low, name in ((x, move_x, tile_x - size, 'x'), (y, move_y, tile_y - size, 'y')):
+        high = low + size + TILE_SIZE
+        if move == 0:
+            if not low < start < high:
+                return None
+            continue
+        t1, t2 = (low - start) / move, (high - start) / move
+        if t1 > t2:
+            t1, t2 = t2, t1
+        if t1 > enter:
+            enter, axis = t1, name
+        leave = min(leave, t2)
+    if enter >= leave or enter >= 1 or leave <= SWEEP_EPSILON:
+        return None
+    return max(enter, 0.0), axis
+
+
+def muzzle_speed(projectile_type, muzzle_velocity):
+    if projectile_type == 'bullet':
+        return 20 * muzzle_velocity
+    if projectile_type == 'bomb':
+        return 10 * muzzle_velocity * 2.1
+    return 50  # the laser ignores the muzzle velocity
+
+
+class Board:
+    # the 8x6 grid doubles as the collision index: an AABB maps straight to
+    # the range of rows and columns it covers, so no tile list is ever scanned
+    def __init__(self, leveldata):
+        self.cells = bytearray()  # one ASCII tile code per cell, row by row from the bottom
+        t_found = False
+        for element in leveldata[:COLUMNS * ROWS]:
+            # only the first target of a layout counts
+            if element == 't':
+                if t_found:
+                    element = 'n'
+                else:
+                    t_found = True
+            self.cells.append(ord(element))
+
+        self._solid_table = None
+        self.version = 0  # bumped whenever a tile is destroyed
+        self.max_shots = 0
+        if len(leveldata) > COLUMNS * ROWS and leveldata[COLUMNS * ROWS].isdigit():
+            self.max_shots = int(leveldata[COLUMNS * ROWS])
+
+    @staticmethod
+    def tile_pos(coord):
+        return (BOARD_X + (coord % COLUMNS) * TILE_SIZE,
+                BOARD_Y + (coord // COLUMNS) * TILE_SIZE)
+
+    def element(self, coord):
+        return chr(self.cells[coord])
+
+    def tiles(self):
+        for coord, code in enumerate(self.cells):
+            yield coord, chr(code)
+
+    def touching(self, x, y, width, height):
+        # collidable tiles overlapped by the box, in coord order
+        first_col, last_col = self._span(x - BOARD_X, width, COLUMNS)
+        first_row, last_row = self._span(y - BOARD_Y, height, ROWS)
+        cells = self.cells
+        for row in range(first_row, last_row + 1):
+            for coord in range(row * COLUMNS + first_col, row * COLUMNS + last_col + 1):
+                if IS_COLLIDABLE[cells[coord]]:
+                    yield coord, chr(cells[coord])
+
+    def in_radius(self, x, y, radius):
+        # collidable tiles a circle overlaps, in coord order: only the tiles
+        # under its bounding box are tested, each against its nearest point
+        first_col, last_col = self._span(x - radius - BOARD_X, 2 * radius, COLUMNS)
+        first_row, last_row = self._span(y - radius - BOARD_Y, 2 * radius, ROWS)
+        cells = self.cells
+        for row in range(first_row, last_row + 1):
+            tile_y = BOARD_Y + row * TILE_SIZE
+            dy = max(tile_y - y, 0, y - tile_y - TILE_SIZE)
+            for col in range(first_col, last_col + 1):
+                coord = row * COLUMNS + col
+                if not IS_COLLIDABLE[cells[coord]]:
+                    continue
+                tile_x = BOARD_X + col * TILE_SIZE
+                dx = max(tile_x - x, 0, x - tile_x - TILE_SIZE)
+                if dx * dx + dy * dy < radius * radius:
+                    yield coord, chr(cells[coord])
+
+    @staticmethod
+    def _span(start, length, count):
+        # first and last tile index strictly overlapped by [start, start + length]
+        first = max(0, math.floor(start / TILE_SIZE))
+        last = min(count - 1, math.ceil((start + length) / TILE_SIZE) - 1)
+        return first, last
+
+    def solid_counts(self, x, y, width, height):
+        # vectorised touching(): number of collidable tiles under every box,
+        # read from a summed-area table of the grid
+        table = self.solid_table()
+        first_col, last_col = self._spans(x - BOARD_X, width, COLUMNS)
+        first_row, last_row = self._spans(y - BOARD_Y, height, ROWS)
+        counts = (table[last_row + 1, last_col + 1] - table[first_row, last_col + 1]
+                  - table[last_row + 1, first_col] + table[first_row, first_col])
+        return np.where((first_col <= last_col) & (first_row <= last_row), counts, 0)
+
+    @staticmethod
+    def _spans(start, length, count):
+        first = np.minimum(np.maximum(np.floor(start / TILE_SIZE), 0), count).astype(np.intp)
+        last = np.maximum(np.minimum(np.ceil((start + length) / TILE_SIZE), count), 0).astype(np.intp) - 1
+        return first, last
+
+    def solid_table(self):
+        if self._solid_table is None:
+            solid = np.frombuffer(self.cells.translate(IS_COLLIDABLE), np.uint8).reshape(ROWS, COLUMNS)
+            self._solid_table = np.zeros((ROWS + 1, COLUMNS + 1), np.int32)
+            self._solid_table[1:, 1:] = solid.cumsum(0).cumsum(1)
+        return self._solid_table
+
+    @property
+    def key(self):
+        # hashable snapshot of the layout, for caches keyed on level state
+        return bytes(self.cells)
+
+    def destroy(self, coord):
+        self.destroy_many((coord,))
+
+    def destroy_many(self, coords):
+        # one board update however many tiles go
+        if not coords:
+            return
+        for coord in coords:
+            self.cells[coord] = ord('n')
+        self._solid_table = None
+        self.version += 1
+
+
+class LaserPath:
+    # polyline a laser follows, with the distance along it of every mirror
+    # bounce and of the point where the laser ends ('left', 'target' or 'stopped')
+    def __init__(self, points, marks):
+        self.points = points
+        self.marks = marks
+        self.lengths = [0.0]
+        for (x1, y1), (x2, y2) in zip(points, points[1:]):
+            self.lengths.append(self.lengths[-1] + math.hypot(x2 - x1, y2 - y1))
+
+    @property
+    def length(self):
+        return self.lengths[-1]
+
+    def at(self, distance):
+        # position and unit direction after travelling distance along the path
+        leg = min(max(bisect_right(self.lengths, distance) - 1, 0), len(self.points) - 2)
+        (x1, y1), (x2, y2) = self.points[leg], self.points[leg + 1]
+        leg_length = self.lengths[leg + 1] - self.lengths[leg]
+        if leg_length == 0:
+            return x1, y1, 0.0, 0.0
+        dir_x, dir_y = (x2 - x1) / leg_length, (y2 - y1) / leg_length
+        travelled = min(distance, self.length) - self.lengths[leg]
+        return x1 + dir_x * travelled, y1 + dir_y * travelled, dir_x, dir_y
+
+
+def _screen_exit(x, y, dir_x, dir_y):
+    # distance from (x, y) to the edge of the screen along the direction
+    distance = math.inf
+    if dir_x > 0:
+        distance = (BASE_WIDTH - x) / dir_x
+    elif dir_x < 0:
+        distance = -x / dir_x
+    if dir_y > 0:
+        distance = min(distance, (BASE_HEIGHT - y) / dir_y)
+    elif dir_y < 0:
+        distance = min(distance, -y / dir_y)
+    return max(distance, 0.0)
+
+
+def trace_laser(cells, x, y, dir_x, dir_y, max_bounces=MAX_LASER_BOUNCES):
+    # walk the ray cell by cell through the grid (Amanatides-Woo DDA),
+    # bouncing off mirrors and ending on the first rock, perpetio or target
+    length = math.hypot(dir_x, dir_y)
+    dir_x, dir_y = dir_x / length, dir_y / length
+    points = [(x, y)]
+    marks = []
+
+    # where the ray enters and leaves the board
+    enter, leave, axis = -math.inf, math.inf, 'x'
+    for start, direction, low, high, name in ((x, dir_x, BOARD_X, BOARD_X + COLUMNS * TILE_SIZE, 'x'),
+                                               (y, dir_y, BOARD_Y, BOARD_Y + ROWS * TILE_SIZE, 'y')):
+        if direction == 0:
+            if not low <= start < high:
+                enter, leave = math.inf, -math.inf
+            continue
+        t1, t2 = (low - start) / direction, (high - start) / direction
+        if t1 > t2:
+            t1, t2 = t2, t1
+        if t1 > enter:
+            enter, axis = t1, name
+        leave = min(leave, t2)
+
+    origin_x, origin_y, origin_t = x, y, 0.0
+    if enter < leave and leave > 0:
+        t = max(enter, 0.0)
+        col = min(max(math.floor((x + dir_x * t - BOARD_X) / TILE_SIZE), 0), COLUMNS - 1)
+        row = min(max(math.floor((y + dir_y * t - BOARD_Y) / TILE_SIZE), 0), ROWS - 1)
+        step_col = 1 if dir_x > 0 else -1
+        step_row = 1 if dir_y > 0 else -1
+        delta_x = TILE_SIZE / abs(dir_x) if dir_x else math.inf
+        delta_y = TILE_SIZE / abs(dir_y) if dir_y else math.inf
+        next_x = t + ((BOARD_X + (col + (dir_x > 0)) * TILE_SIZE) - (x + dir_x * t)) / dir_x if dir_x else math.inf
+        next_y = t + ((BOARD_Y + (row + (dir_y > 0)) * TILE_SIZE) - (y + dir_y * t)) / dir_y if dir_y else math.inf
+        bounces = 0
+
+        while 0 <= col < COLUMNS and 0 <= row < ROWS:
+            coord = row * COLUMNS + col
+            element = chr(cells[coord])
+            if element in COLLIDABLES:
+                hit_x = origin_x + dir_x * (t - origin_t)
+                hit_y = origin_y + dir_y * (t - origin_t)
+                points.append((hit_x, hit_y))
+                if element != 'm' or bounces == max_bounces:
+                    marks.append((t, 'target' if element == 't' else 'stopped', coord))
+                    return LaserPath(points, marks)
+
+                # bounce back into the cell the ray came from
+                marks.append((t, 'reflected', coord))
+                bounces += 1
+                origin_x, origin_y, origin_t = hit_x, hit_y, t
+                if axis == 'x':
+                    dir_x, step_col = -dir_x, -step_col
+                    col += step_col
+                    next_x = t + delta_x
+                else:
+                    dir_y, step_row = -dir_y, -step_row
+                    row += step_row
+                    next_y = t + delta_y
+                continue
+
+            if next_x < next_y:
+                t, next_x, col, axis = next_x, next_x + delta_x, col + step_col, 'x'
+            else:
+                t, next_y, row, axis = next_y, next_y + delta_y, row + step_row, 'y'
+
+    # off the board: straight on to the edge of the screen
+    exit_t = origin_t + _screen_exit(origin_x, origin_y, dir_x, dir_y)
+    points.append((origin_x + dir_x * (exit_t - origin_t), origin_y + dir_y * (exit_t - origin_t)))
+    marks.append((exit_t, 'left', None))
+    return LaserPath(points, marks)
+
+
+@lru_cache(maxsize=512)
+def laser_path(cells, angle):
+    # path of a laser fired from the cannon, shared by the aim preview and the shot
+    return trace_laser(cells, 0, BASE_HEIGHT / 2,
+                       math.cos(math.radians(angle)), math.sin(math.radians(angle)))
+
+
+class ProjectileStore:
+    # every live projectile as one row across parallel NumPy arrays, kept in
+    # firing order so a tick integrates and culls all of them in one go
+    FIELDS = ('x', 'y', 'px', 'py', 'dx', 'dy', 'gravity', 'size', 'type')
+
+    def __init__(self, capacity=16):
+        self.count = 0
+        self.views = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        old = {name: getattr(self, name, None) for name in self.FIELDS + ('alive',)}
+        for name in ('x', 'y', 'px', 'py', 'dx', 'dy', 'gravity', 'size'):
+            setattr(self, name, np.zeros(capacity))
+        self.type = np.zeros(capacity, np.int8)
+        self.alive = np.zeros(capacity, bool)
+        for name, array in old.items():
+            if array is not None:
+                getattr(self, name)[:self.count] = array[:self.count]
+
+    def __len__(self):
+        return self.count
+
+    def add(self, projectile_type, pos, angle, velocity):
+        if self.count == len(self.x):
+            self._allocate(2 * len(self.x))
+        index = self.count
+        spec = PROJECTILES[projectile_type]
+        self.x[index], self.y[index] = pos
+        self.px[index], self.py[index] = pos
+        gravity = spec['mass'] * 9.81
+        self.dx[index] = velocity * math.cos(math.radians(angle))
+        # the base rate takes gravity off before each move, so its positions
+        # lie on the parabola whose starting vertical speed is half a tick's
+        # gravity lower; dy is the speed along that parabola
+        self.dy[index] = velocity * math.sin(math.radians(angle)) - gravity / 2
+        self.gravity[index] = gravity
+        self.size[index] = spec['size']
+        self.type[index] = PROJECTILE_TYPES.index(projectile_type)
+        self.alive[index] = True
+        self.count += 1
+
+        projectile = Projectile(self, index, projectile_type, angle, velocity)
+        self.views.append(projectile)
+        return projectile
+
+    def compact(self):
+        # drop dead rows, keeping the survivors in order
+        n = self.count
+        keep = self.alive[:n].copy()
+        if keep.all():
+            return
+        for projectile, live in zip(self.views, keep):
+            if not live:
+                projectile.detach()
+        k = int(keep.sum())
+        for name in self.FIELDS:
+            array = getattr(self, name)
+            array[:k] = array[:n][keep]
+        self.alive[:k] = True
+        self.alive[k:n] = False
+        self.views = [p for p in self.views if p.index is not None]
+        for index, projectile in enumerate(self.views):
+            projectile.index = index
+        self.count = k
+
+
+def _column(name):
+    # attribute backed by a ProjectileStore array while the projectile is live
+    def get(self):
+        if self.index is None:
+            return self.final[name]
+        return float(getattr(self.store, name)[self.index])
+
+    def set(self, value):
+        if self.index is None:
+            self.final[name] = value
+        else:
+            getattr(self.store, name)[self.index] = value
+
+    return property(get, set)
+
+
+class Projectile:
+    # thin view over one row of a ProjectileStore; once the projectile dies
+    # it keeps a copy of its last state so callers can still read it
+    x = _column('x')
+    y = _column('y')
+    dx = _column('dx')
+    dy = _column('dy')
+    px = _column('px')  # position before the last step, for render interpolation
+    py = _column('py')
+
+    def __init__(self, store, index, projectile_type, angle, velocity):
+        self.store = store
+        self.index = index
+        self.final = None
+        self.type = projectile_type
+        self.angle = angle
+        self.velocity = velocity
+        self.size = PROJECTILES[projectile_type]['size']
+        self.mass = PROJECTILES[projectile_type]['mass']
+
+    @property
+    def alive(self):
+        return self.index is not None and bool(self.store.alive[self.index])
+
+    def kill(self):
+        self.store.alive[self.index] = False
+
+    def detach(self):
+        self.final = {name: getattr(self, name) for name in ('x', 'y', 'px', 'py', 'dx', 'dy')}
+        self.index = None
+
+    def interpolated(self, alpha):
+        # position a fraction alpha of the way through the last step
+        px, py = self.px, self.py
+        return px + (self.x - px) * alpha, py + (self.y - py) * alpha
+
+
+class World:
+    def __init__(self, leveldata, tick_rate=BASE_TICK_RATE):
+        self.board = Board(leveldata)
+        self.store = ProjectileStore()
+        self.tick = 0
+        self.tick_rate = tick_rate
+        self.step_scale = BASE_TICK_RATE / tick_rate
+
+    @property
+    def projectiles(self):
+        return self.store.views
+
+    def fire(self, angle, muzzle_velocity, projectile_type):
+        cannon_pos = (0, BASE_HEIGHT / 2)
+        projectile = self.store.add(projectile_type, cannon_pos, angle,
+                                    muzzle_speed(projectile_type, muzzle_velocity))
+        if projectile_type == 'laser':
+            # lasers have no gravity: the whole path is known when fired
+            projectile.path = laser_path(self.board.key, angle)
+            projectile.path_version = self.board.version
+            projectile.travelled = 0.0
+            projectile.mark = 0
+        return projectile
+
+    @timed('tick')
+    def step(self):
+        self.tick += 1
+        events = []
+        store = self.store
+        n = store.count
+        if n == 0:
+            return events
+
+        live = store.alive[:n]
+        x, y = store.x[:n], store.y[:n]
+        dx, dy = store.dx[:n], store.dy[:n]
+
+        store.px[:n] = x
+        store.py[:n] = y
+
+        # move every projectile along its exact parabola for the length of a
+        # step, so any tick rate lands on the base rate's positions
+        scale = self.step_scale
+        gravity = store.gravity[:n]
+        x += dx * scale
+        y += dy * scale - gravity * (scale * scale / 2)
+        dy -= gravity * scale
+
+        # only projectiles whose swept box crosses a collidable tile need
+        # the exact per-tile pass
+        px, py, size = store.px[:n], store.py[:n], store.size[:n]
+        move_x, move_y = np.abs(x - px), np.abs(y - py)
+        touching = self.board.solid_counts(np.minimum(x, px), np.minimum(y, py),
+                                           size + move_x, size + move_y) > 0
+        lasers = store.type[:n] == LASER
+        for index in np.flatnonzero(live & touching & ~lasers):
+            self.sweep(store.views[index], events)
+        for index in np.flatnonzero(live & lasers):
+            self.advance_laser(store.views[index], events)
+
+        # Check if projectiles are off-screen
+        off_screen = live & ((y < 0) | (y > BASE_HEIGHT) | (x < 0) | (x > BASE_WIDTH))
+        for index in np.flatnonzero(off_screen):
+            projectile = store.views[index]
+            projectile.kill()
+            events.append(Event(self.tick, 'left', projectile, None))
+
+        store.compact()
+        return events
+
+    def advance_laser(self, laser, events):
+        # move along the traced path, retracing from here if tiles were
+        # destroyed since it was computed
+        if laser.path_version != self.board.version:
+            laser.path = trace_laser(self.board.cells, laser.px, laser.py, laser.dx, laser.dy)
+            laser.path_version = self.board.version
+            laser.travelled = 0.0
+            laser.mark = 0
+        laser.travelled += laser.velocity * self.step_scale
+
+        marks = laser.path.marks
+        while laser.alive and laser.mark < len(marks) and marks[laser.mark][0] <= laser.travelled:
+            _, kind, coord = marks[laser.mark]
+            laser.mark += 1
+            if kind == 'reflected':
+                events.append(Event(self.tick, 'reflected', laser, coord))
+            elif kind == 'target':
+                events.append(Event(self.tick, 'target', laser, coord))
+                self.stop(laser, coord, events)
+            elif kind == 'left':
+                laser.kill()
+                events.append(Event(self.tick, 'left', laser, None))
+            else:
+                self.stop(laser, coord, events)
+
+        x, y, dir_x, dir_y = laser.path.at(laser.travelled)
+        laser.x, laser.y = x, y
+        if dir_x or dir_y:
+            laser.dx, laser.dy = dir_x * laser.velocity, dir_y * laser.velocity
+
+    @timed('sweep')
+    def sweep(self, projectile, events):
+        # replay this step's move from the previous position, resolving tiles
+        # in the order the projectile reaches them, so nothing is tunnelled
+        # through; lasers follow their traced path in advance_laser instead
+        x, y = projectile.px, projectile.py
+        move_x, move_y = projectile.x - x, projectile.y - y
+        passed = set()
+        for _ in range(MAX_SWEEP_HITS):
+            hits = self.first_hits(x, y, move_x, move_y, projectile.size, passed)
+            if not hits:
+                break
+            t = hits[0][0]
+            x, y = x + move_x * t, y + move_y * t
+            move_x, move_y = move_x * (1 - t), move_y * (1 - t)
+            projectile.x, projectile.y = x, y
+
+            # a target reached at the same time as a rock still counts, but
+            # once the projectile has stopped nothing else is hit
+            hits.sort(key=lambda hit: hit[2] != 't')
+            for _, coord, element in hits:
+                if not projectile.alive:
+                    break
+                passed.add(coord)
+                self.handle_collision(projectile, coord, element, events)
+            if not projectile.alive:
+                return
+
+        projectile.x, projectile.y = x + move_x, y + move_y
+
+    def first_hits(self, x, y, move_x, move_y, size, passed):
+        # every not yet resolved tile reached at the earliest time of impact
+        hits = []
+        box_x, box_y = min(x, x + move_x), min(y, y + move_y)
+        for coord, element in self.board.touching(box_x, box_y, size + abs(move_x), size + abs(move_y)):
+            if coord in passed:
+                continue
+            tile_x, tile_y = self.board.tile_pos(coord)
+            hit = sweep_tile(x, y, move_x, move_y, size, tile_x, tile_y)
+            if hit is not None:
+                hits.append((hit[0], coord, element))
+        if not hits:
+            return hits
+        first = min(hit[0] for hit in hits)
+        return [hit for hit in hits if hit[0] <= first + SWEEP_EPSILON]
+
+    @timed('collision')
+    def handle_collision(self, projectile, coord, element, events):
+        if element == 't':
+            events.append(Event(self.tick, 'target', projectile, coord))
+            return
+        if projectile.type == 'bomb':
+            if projectile.alive:
+                self.explode(projectile, events)
+        elif element == 'r':
+            self.destroy(projectile, coord, events)
+        self.stop(projectile, coord, events)
+
+    def explode(self, bomb, events):
+        # every rock within the blast around the bomb's centre, the one it
+        # hit included, goes in a single board update; the 'exploded' event
+        # carries them all, followed by a 'destroyed' event for each
+        half = bomb.size / 2
+        rocks = tuple(coord for coord, element in self.board.in_radius(bomb.x + half, bomb.y + half, BLAST_RADIUS)
+                      if element == 'r')
+        self.board.destroy_many(rocks)
+        events.append(Event(self.tick, 'exploded', bomb, rocks))
+        for coord in rocks:
+            events.append(Event(self.tick, 'destroyed', bomb, coord))
+
+    def destroy(self, projectile, coord, events):
+        self.board.destroy(coord)
+        events.append(Event(self.tick, 'destroyed', projectile, coord))
+
+    def stop(self, projectile, coord, events):
+        if projectile.alive:
+            projectile.kill()
+            events.append(Event(self.tick, 'stopped', projectile, coord))
+
+
+class ShotResult:
+    def __init__(self, trajectory, events, board):
+        self.trajectory = trajectory
+        self.events = events
+        self.board = board
+
+    @property
+    def hit_target(self):
+        return any(event.kind == 'target' for event in self.events)
+
+    @property
+    def destroyed(self):
+        return [event.coord for event in self.events if event.kind == 'destroyed']
+
+
+def simulate_shot(leveldata, angle, muzzle_velocity, projectile_type, ticks,
+                  tick_rate=BASE_TICK_RATE):
+    world = World(leveldata, tick_rate)
+    projectile = world.fire(angle, muzzle_velocity, projectile_type)
+    trajectory = [(projectile.x, projectile.y)]
+    events = []
+    for _ in range(ticks):
+        if not world.projectiles:
+            break
+        events.extend(world.step())
+        trajectory.append((projectile.x, projectile.y))
+    return ShotResult(trajectory, events, world.board)
@@ -0,0 +1,157 @@
+import argparse
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+
+from levels import read_levels
+from simulation import Board, COLUMNS, ROWS, PROJECTILE_TYPES, simulate_shot
+
+# Checks that every layout in the level files can be beaten within its shot
+# budget, running the game's physics headless. Each layout is searched
+# breadth first over board states (rocks cleared so far), so the first
+# solution found uses the fewest shots.
+#
+#   python solver.py                        # every file in assets/level_data
+#   python solver.py assets/level_data/3.txt --angle-step 0.5 --json report.json
+#
+# Boards only ever lose rocks, so a shot that changed nothing and touched no
+# rock on a board does exactly the same on every board reached from it: such
+# shots are tried once per branch of the search, not once per state.
+
+SHOT_TICKS = 300  # ten seconds of flight at the base tick rate
+
+
+def candidate_shots(angle_step):
+    angles = []
+    angle = -90 + angle_step
+    while angle < 90:
+        angles.append(round(angle, 6))
+        angle += angle_step
+    shots = []
+    for projectile_type in PROJECTILE_TYPES:
+        # the laser's speed does not depend on the muzzle velocity
+        velocities = [1] if projectile_type == 'laser' else range(1, 6)
+        for muzzle_velocity in velocities:
+            for angle in angles:
+                shots.append((projectile_type, muzzle_velocity, angle))
+    return shots
+
+
+def is_dead(result, board):
+    # nothing destroyed and no rock in the way: removing rocks elsewhere
+    # cannot change where this shot goes
+    for event in result.events:
+        if event.kind == 'destroyed':
+            return False
+        if isinstance(event.coord, int) and board.element(event.coord) == 'r':
+            return False
+    return True
+
+
+def solve_layout(job):
+    file_path, line_number, layout, angle_step, max_states, time_limit = job
+    report = {'file': file_path, 'line': line_number, 'max_shots': 0,
+              'solved': False, 'solution': None, 'states': 0, 'timed_out': False,
+              'seconds': 0.0, 'error': None}
+    if len(layout) != COLUMNS * ROWS + 1 or not layout[-1].isdigit():
+        report['error'] = f'expected {COLUMNS * ROWS} tiles and a shot digit, got {layout!r}'
+        return report
+    board = Board(layout)
+    report['max_shots'] = board.max_shots
+    if 't' not in layout:
+        report['error'] = 'layout has no target'
+        return report
+
+    start = perf_counter()
+    shots = candidate_shots(angle_step)
+    seen = {board.key}
+    # board cells, shots that led there, and shots known to do nothing there
+    frontier = [(board.key, [], frozenset())]
+    for _ in range(board.max_shots):
+        next_frontier = []
+        for cells, sequence, inherited in frontier:
+            report['states'] += 1
+            layout = cells.decode('ascii')
+            state = Board(layout)
+            dead = set(inherited)
+            for i, shot in enumerate(shots):
+                if i in dead:
+                    continue
+                if perf_counter() - start > time_limit:
+                    report['timed_out'] = True
+                    report['seconds'] = perf_counter() - start
+                    return report
+                result = simulate_shot(layout, shot[2], shot[1], shot[0], SHOT_TICKS)
+                if result.hit_target:
+                    report['solved'] = True
+                    report['solution'] = [list(s) for s in sequence + [shot]]
+                    report['seconds'] = perf_counter() - start
+                    return report
+                key = result.board.key
+                if key == cells:
+                    if is_dead(result, state):
+                        dead.add(i)
+                    continue
+                # keep shots that change the board as openings for the next shot
+                if key not in seen and len(seen) < max_states:
+                    seen.add(key)
+                    next_frontier.append((key, sequence + [shot], dead))
+        frontier = next_frontier
+        if not frontier:
+            break
+    report['seconds'] = perf_counter() - start
+    return report
+
+
+def format_report(report):
+    where = f"{report['file']}:{report['line']}"
+    if report['error']:
+        return f'{where}  INVALID  {report["error"]}'
+    if report['timed_out']:
+        return f"{where}  UNSOLVED, gave up after {report['seconds']:.0f} s ({report['states']} board states searched)"
+    if not report['solved']:
+        return f"{where}  UNSOLVED within {report['max_shots']} shots ({report['states']} board states searched)"
+    shots = ', '.join(f'{t} v{v} {a:g}deg' for t, v, a in report['solution'])
+    return f"{where}  {len(report['solution'])}/{report['max_shots']} shots: {shots}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that every level layout can be solved.')
+    parser.add_argument('files', nargs='*', help='level files (default: assets/level_data/*.txt)')
+    parser.add_argument('--angle-step', type=float, default=2.0, help='degrees between tried angles')
+    parser.add_argument('--max-states', type=int, default=200,
+                        help='cap on distinct board states explored per layout')
+    parser.add_argument('--time-limit', type=float, default=60.0,
+                        help='seconds spent on one layout before it is reported unsolved')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--json', help='also write the full report to this file')
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob('assets/level_data/*.txt'))
+    jobs = []
+    for file_path in files:
+        for line_number, layout in enumerate(read_levels(file_path), 1):
+            jobs.append((file_path, line_number, layout, args.angle_step, args.max_states,
+                         args.time_limit))
+
+    # layouts are reported as they finish, the file keeps them in order
+    reports = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for future in as_completed([pool.submit(solve_layout, job) for job in jobs]):
+            report = future.result()
+            print(format_report(report), flush=True)
+            reports.append(report)
+    reports.sort(key=lambda report: (report['file'], report['line']))
+
+    unsolved = sum(1 for report in reports if not report['solved'])
+    print(f'{len(reports) - unsolved}/{len(reports)} layouts solved')
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(reports, file, indent=2)
+    return 1 if unsolved else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,58 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Where the time to the first frame goes: imported first thing by main.py,
+# it times the imports, the kv parse, every image decoded before the first
+# frame and the first frame itself, then logs one summary line.
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks = []  # (name, seconds since start)
+        self.spans = defaultdict(lambda: [0.0, 0])  # name -> [total seconds, count]
+        self.image_load = None
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.start))
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = self.spans[name]
+            total[0] += time.perf_counter() - start
+            total[1] += 1
+
+    def watch_images(self):
+        # time every image decode until the first frame
+        from kivy.core.image import ImageLoader
+        self.image_load = ImageLoader.load
+
+        def load(filename, **kwargs):
+            with self.span('texture decode'):
+                return self.image_load(filename, **kwargs)
+        ImageLoader.load = staticmethod(load)
+
+    def watch_first_frame(self, window):
+        def on_flip(*args):
+            window.unbind(on_flip=on_flip)
+            self.mark('first frame')
+            if self.image_load is not None:
+                from kivy.core.image import ImageLoader
+                ImageLoader.load = staticmethod(self.image_load)
+                self.image_load = None
+            from kivy.logger import Logger
+            Logger.info(f'Startup: {self.report()}')
+        window.bind(on_flip=on_flip)
+
+    def report(self):
+        parts = [f'{name} at {seconds * 1000:.0f} ms' for name, seconds in self.marks]
+        parts += [f'{name} {total * 1000:.0f} ms ({count}x)' for name, (total, count) in self.spans.items()]
+        return ', '.join(parts)
+
+
+profiler = StartupProfiler()
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# the game's modules sit at the top of the repository, next to this folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Kivy tests get a window without a display, and no sound; this has to be
+# set before Kivy is first imported
+os.environ.setdefault('SDL_VIDEODRIVER', 'offscreen')
+os.environ.setdefault('KIVY_GL_BACKEND', 'mock')
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('CANNON_MUTE', '1')
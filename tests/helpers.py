@@ -0,0 +1,42 @@
+from simulation import COLUMNS, ROWS
+
+# layouts, runs and a hand-driven Clock shared between test modules
+
+
+def make_layout(tiles=None, shots=3):
+    # an empty board with the given {coord: element} tiles on it
+    cells = ['n'] * (COLUMNS * ROWS)
+    for coord, element in (tiles or {}).items():
+        cells[coord] = element
+    return cells + [str(shots)]
+
+
+def coord(col, row):
+    return row * COLUMNS + col
+
+
+def run(world, ticks=300):
+    events = []
+    for _ in range(ticks):
+        if not world.projectiles:
+            break
+        events += world.step()
+    return events
+
+
+def wall(col):
+    return {coord(col, row): 'r' for row in range(ROWS)}
+
+
+class FakeClock:
+    # stands in for kivy.clock.Clock: callbacks run when a test calls frame()
+    def __init__(self):
+        self.scheduled = []
+
+    def schedule_once(self, callback, timeout=0):
+        self.scheduled.append(callback)
+
+    def frame(self):
+        callbacks, self.scheduled = self.scheduled, []
+        for callback in callbacks:
+            callback(0)
@@ -0,0 +1,81 @@
+import pytest
+
+pytest.importorskip('kivy')
+
+import audio  # noqa: E402
+from audio import AudioManager  # noqa: E402
+
+from helpers import FakeClock  # noqa: E402
+
+SOURCES = ['a.wav', 'b.wav', 'c.wav', 'd.wav']
+
+
+class FakeSound:
+    def __init__(self, source):
+        self.source = source
+        self.state = 'stop'
+        self.plays = 0
+
+    def play(self):
+        self.state = 'play'
+        self.plays += 1
+
+    def stop(self):
+        self.state = 'stop'
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(audio, 'Clock', clock)
+    monkeypatch.setattr(audio.SoundLoader, 'load', staticmethod(FakeSound))
+    return clock
+
+
+@pytest.fixture
+def manager(clock):
+    manager = AudioManager(SOURCES, voices=2)
+    manager.preload()
+    while clock.scheduled:
+        clock.frame()
+    return manager
+
+
+def playing(manager):
+    return [sound.source for sound in manager.samples.values() if sound.state == 'play']
+
+
+def test_preload_decodes_one_sound_per_frame(clock):
+    manager = AudioManager(SOURCES)
+    manager.preload()
+    for loaded in range(1, len(SOURCES) + 1):
+        clock.frame()
+        assert len(manager.samples) == loaded
+    assert not clock.scheduled
+    manager.preload()  # already loaded, nothing is decoded again
+    assert not clock.scheduled
+
+
+def test_a_new_sound_steals_the_oldest_voice(manager):
+    for source in ('a.wav', 'b.wav', 'c.wav'):
+        manager.play(source)
+    assert playing(manager) == ['b.wav', 'c.wav']
+    manager.play('d.wav')
+    assert playing(manager) == ['c.wav', 'd.wav']
+
+
+def test_finished_sounds_free_their_voice(manager):
+    manager.play('a.wav')
+    manager.play('b.wav')
+    manager.samples['a.wav'].stop()  # played to the end
+    manager.play('c.wav')
+    assert playing(manager) == ['b.wav', 'c.wav']
+
+
+def test_a_playing_sound_restarts(manager):
+    manager.play('a.wav')
+    manager.play('b.wav')
+    manager.play('a.wav')
+    assert playing(manager) == ['a.wav', 'b.wav']
+    assert manager.samples['a.wav'].plays == 2
+    assert manager.playing == [manager.samples['b.wav'], manager.samples['a.wav']]
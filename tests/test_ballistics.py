@@ -0,0 +1,37 @@
+import pytest
+
+from ballistics import preview_points
+from simulation import BASE_TICK_RATE, Board, PROJECTILES, simulate_shot
+
+EMPTY = ['n'] * 48 + ['3']
+
+
+@pytest.mark.parametrize('tick_rate', [BASE_TICK_RATE, 2 * BASE_TICK_RATE, 4 * BASE_TICK_RATE])
+@pytest.mark.parametrize('projectile_type, muzzle_velocity, angle', [
+    ('bullet', 1, 0), ('bullet', 3, 30), ('bomb', 2, 45), ('bomb', 5, -20)])
+def test_arc_table_matches_the_simulation(projectile_type, muzzle_velocity, angle, tick_rate):
+    # the closed form has to land where World.step puts the projectile at
+    # every base tick, whatever rate the World steps at
+    points = preview_points(Board(EMPTY), projectile_type, muzzle_velocity, angle)
+    steps = tick_rate // BASE_TICK_RATE
+    trajectory = simulate_shot(EMPTY, angle, muzzle_velocity, projectile_type, 40 * steps,
+                               tick_rate).trajectory[::steps]
+    half = PROJECTILES[projectile_type]['size'] / 2
+    count = min(len(points) // 2, len(trajectory))
+    assert count > 1
+    for i in range(count):
+        x, y = trajectory[i]
+        assert points[2 * i] == pytest.approx(x + half, abs=0.01)
+        assert points[2 * i + 1] == pytest.approx(y + half, abs=0.01)
+
+
+def test_preview_stops_at_the_first_collidable_tile():
+    wall = ['n'] * 48
+    for row in range(6):
+        wall[row * 8] = 'p'
+    board = Board(wall + ['3'])
+    points = preview_points(board, 'bullet', 5, 0)
+    xs = points[::2]
+    # one point past the hit, none beyond the wall's far side
+    assert max(xs) < 480 + 180
+    assert len(xs) < len(preview_points(Board(EMPTY), 'bullet', 5, 0)[::2])
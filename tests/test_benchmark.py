@@ -0,0 +1,46 @@
+import pytest
+
+import benchmark
+from benchmark import METRICS, compare, measure, metrics
+
+
+def test_measure_times_every_pass(monkeypatch):
+    monkeypatch.setattr(benchmark, 'ROUND_SECONDS', 1.0)
+    times = iter([0.3] * 5)
+    seconds, counts = measure(lambda: (next(times), 7, 3))
+    # passes run until they add up to ROUND_SECONDS
+    assert seconds == [0.3] * 4
+    assert counts == [7, 3]
+
+
+def test_metrics_come_from_the_fastest_pass():
+    passes = {'volley.bullet': [0.3, 0.1, 0.2], 'volley.bomb': [0.2], 'volley.laser': [0.2],
+              'destroy': [0.5, 0.4], 'level_load': [0.2]}
+    counts = {'volley.bullet': [100, 50], 'volley.bomb': [100, 50], 'volley.laser': [100, 50],
+              'destroy': [10], 'level_load': [100]}
+    results = metrics(passes, counts)
+    assert list(results) == list(METRICS)
+    assert results['ticks_per_sec.bullet'] == pytest.approx(1000)
+    assert results['ticks_per_sec'] == pytest.approx(300 / 0.5)
+    assert results['collision_checks_per_sec'] == pytest.approx(150 / 0.5)
+    assert results['destroy_redraw_ms'] == pytest.approx(40)
+
+
+def test_compare_flags_metrics_worse_than_the_threshold():
+    baseline = {'metrics': {'ticks_per_sec': 1000, 'destroy_redraw_ms': 1.0}, 'environment': {}}
+    report = {'metrics': {'ticks_per_sec': 800, 'destroy_redraw_ms': 1.1, 'level_load_ms': 2.0},
+              'environment': {'reference_ms': 5.0}}
+    lines, regressions = compare(report, baseline, 0.15)
+    assert regressions == ['ticks_per_sec']
+    assert 'no baseline' in lines[-1]
+
+
+def test_compare_allows_for_a_slower_machine():
+    # everything, the reference included, ran 25% longer than for the baseline
+    baseline = {'metrics': {'ticks_per_sec': 1000, 'destroy_redraw_ms': 1.0},
+                'environment': {'reference_ms': 4.0}}
+    report = {'metrics': {'ticks_per_sec': 800, 'destroy_redraw_ms': 1.25},
+              'environment': {'reference_ms': 5.0}}
+    lines, regressions = compare(report, baseline, 0.15)
+    assert regressions == []
+    assert all('+0.0%' in line for line in lines[1:])
@@ -0,0 +1,100 @@
+import math
+
+import pytest
+
+pytest.importorskip('kivy')
+
+from main import CannonApp  # noqa: E402
+from simulation import BASE_HEIGHT  # noqa: E402
+
+LAYOUT = list('nnnnnnnn' 'nnnnnnnn' 'nnnnnnnn' 'nnnnnnnt' 'nnnnnnnn' 'nnnnnnnn' '3')
+
+
+@pytest.fixture(scope='module')
+def app():
+    app = CannonApp()
+    app.load_kv(filename='cannon.kv')
+    app.root = app.build()
+    app.current_username, app.current_level, app.current_score = 'tester', 0, 0
+    return app
+
+
+def attached(app):
+    return list(app.game_screen.ids.level_canvas.canvas.children)
+
+
+def test_draw_level_keeps_layers_attached(app):
+    for _ in range(2):
+        app.draw_level(LAYOUT)
+    children = attached(app)
+    screen = app.game_screen
+    assert screen.aim_preview.canvas in children
+    assert screen.projectile_layer.canvas in children
+    # the board is drawn underneath everything else, and only once
+    assert children.index(app.board_mesh) == 0
+    assert sum(isinstance(child, type(app.board_mesh)) for child in children) == 1
+
+
+def test_laser_preview_is_drawn(app):
+    app.draw_level(LAYOUT)
+    app.current_projectile_index = app.projectile_types.index('laser')
+    app.cannon_angle = 0
+    app.update_aim_preview()
+    preview = app.game_screen.aim_preview
+    assert preview.canvas in attached(app)
+    assert len(preview.line.points) >= 4
+
+
+def test_ballistic_preview_is_drawn(app):
+    app.draw_level(LAYOUT)
+    app.current_projectile_index = app.projectile_types.index('bullet')
+    app.root.current = 'game'
+    app.on_mouse_move(None, (400, 400))
+    app.update_projectyles(0)
+    preview = app.game_screen.aim_preview
+    assert preview.canvas in attached(app)
+    assert preview.dots.points
+    assert not preview.line.points
+
+
+def test_physics_catches_up_at_most_max_physics_steps(app):
+    app.draw_level(LAYOUT)
+    step_time = 1 / app.physics_rate
+    # a one second stall runs the capped number of steps and drops the rest
+    app.update_projectyles(1.0)
+    assert app.world.tick == app.max_physics_steps
+    assert 0 <= app.physics_time < step_time
+    # a frame two and a half steps long runs two and keeps the half
+    tick, app.physics_time = app.world.tick, 0
+    app.update_projectyles(2.5 * step_time)
+    assert app.world.tick == tick + 2
+    assert app.physics_time == pytest.approx(0.5 * step_time)
+
+
+def test_hud_is_drawn_over_the_board(app):
+    screen = app.game_screen
+    # the last child added is drawn last and sits first in children
+    assert screen.children[0] == screen.ids.hud
+    drawn = list(reversed(screen.children))
+    assert drawn.index(screen.ids.hud) > drawn.index(screen.ids.level_canvas)
+
+
+class Click:
+    button = 'left'
+
+
+def test_click_fires_at_the_latest_move(app):
+    app.draw_level(LAYOUT)
+    app.root.current = 'game'
+    app.current_projectile_index = app.projectile_types.index('bullet')
+    app.cannon_angle = 0
+    # several moves in one frame are coalesced into the last one
+    app.on_mouse_move(None, (100, 100))
+    app.on_mouse_move(None, (400, 700))
+    assert app.cannon_angle == 0
+    app.on_mouse_click(None, Click())
+    assert app.pointer is None
+    projectile, = app.world.projectiles
+    assert projectile.angle == pytest.approx(app.cannon_angle)
+    world_x, world_y = app.game_screen.camera.to_world(400, 700)
+    assert app.cannon_angle == pytest.approx(math.degrees(math.atan2(world_y - BASE_HEIGHT / 2, world_x)))
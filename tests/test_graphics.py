@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip('kivy')
+
+from kivy.core.window import Window  # noqa: E402,F401  the GL context
+from kivy.graphics import Mesh  # noqa: E402
+
+import graphics  # noqa: E402
+from simulation import Board, COLUMNS  # noqa: E402
+
+from helpers import make_layout, wall  # noqa: E402
+
+
+class CountingMesh(Mesh):
+    # a real Mesh that counts how often its index buffer is uploaded
+    @property
+    def indices(self):
+        return Mesh.indices.__get__(self)
+
+    @indices.setter
+    def indices(self, value):
+        self.uploads = getattr(self, 'uploads', 0) + 1
+        Mesh.indices.__set__(self, value)
+
+
+@pytest.fixture
+def counting_mesh(monkeypatch):
+    monkeypatch.setattr(graphics, 'Mesh', CountingMesh)
+
+
+def test_board_mesh_batches_removals_into_one_upload(counting_mesh):
+    board = Board(make_layout({**wall(0), **wall(2)}))
+    mesh = graphics.BoardMesh(board)
+    before = list(mesh.indices)
+    uploads = mesh.mesh.uploads
+    removed = [0, 2 * COLUMNS, 2]
+    collapsed = {mesh.quads[coord] for coord in removed}
+    for coord in removed:
+        mesh.remove_tile(coord)
+    mesh.remove_tile(1)  # not drawn, nothing to remove
+    assert mesh.mesh.uploads == uploads
+    mesh.flush()
+    mesh.flush()
+    assert mesh.mesh.uploads == uploads + 1
+    for quad in range(len(before) // 6):
+        expected = [0] * 6 if quad in collapsed else before[6 * quad:6 * quad + 6]
+        assert list(mesh.mesh.indices)[6 * quad:6 * quad + 6] == expected
@@ -0,0 +1,59 @@
+import csv
+import json
+
+import pytest
+
+from instrumentation import Instrumentation
+
+
+def test_disabled_spans_are_not_recorded():
+    instruments = Instrumentation(enabled=False)
+
+    @instruments.timed('tick')
+    def step(value):
+        return value + 1
+
+    assert step(1) == 2
+    assert instruments.summary() == {}
+
+
+def test_percentiles_in_milliseconds():
+    instruments = Instrumentation(enabled=True)
+    for ms in range(1, 101):
+        instruments.record('frame', ms / 1000)
+    stats = instruments.stats('frame')
+    assert stats['count'] == 100
+    assert stats['mean'] == pytest.approx(50.5)
+    assert stats['p50'] == pytest.approx(50.5)
+    assert stats['p99'] == pytest.approx(99.01)
+
+
+def test_window_keeps_the_latest_samples():
+    instruments = Instrumentation(window=3, enabled=True)
+    for seconds in (1, 2, 3, 4):
+        instruments.record('frame', seconds)
+    assert instruments.stats('frame')['mean'] == pytest.approx(3000)
+
+
+def test_timed_records_when_the_function_raises():
+    instruments = Instrumentation(enabled=True)
+
+    @instruments.timed('collision')
+    def fail():
+        raise RuntimeError
+
+    with pytest.raises(RuntimeError):
+        fail()
+    assert instruments.stats('collision')['count'] == 1
+
+
+def test_exports(tmp_path):
+    instruments = Instrumentation(enabled=True)
+    instruments.record('tick', 0.002)
+    instruments.export_json(str(tmp_path / 'profile.json'))
+    instruments.export_csv(str(tmp_path / 'profile.csv'))
+    with open(tmp_path / 'profile.json') as file:
+        assert json.load(file)['tick']['p50'] == pytest.approx(2)
+    with open(tmp_path / 'profile.csv', newline='') as file:
+        rows = list(csv.reader(file))
+    assert rows[0][:2] == ['span', 'count'] and rows[1][:2] == ['tick', '1']
@@ -0,0 +1,75 @@
+import pytest
+
+import leaderboard
+from leaderboard import Leaderboard, OVERALL
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return {'history_path': str(tmp_path / 'scores.log'),
+            'snapshot_path': str(tmp_path / 'leaderboard.json'),
+            'legacy_path': str(tmp_path / 'high_scores.txt')}
+
+
+def test_keeps_the_best_top_n(paths):
+    board = Leaderboard(top_n=5, **paths)
+    for score in [30, 10, 50, 20, 60, 40, 5, 70]:
+        board.record(f'p{score}', score)
+    assert board.size(OVERALL) == 5
+    assert board.page(OVERALL, 0, 3) == [(1, 'p70', 70), (2, 'p60', 60), (3, 'p50', 50)]
+    assert board.page(OVERALL, 1, 3) == [(4, 'p40', 40), (5, 'p30', 30)]
+
+
+def test_level_wins_count_for_their_level_and_projectile(paths):
+    board = Leaderboard(**paths)
+    board.record('ann', 200, level=1, projectile_type='bomb')
+    board.record('bob', 100, level=2)
+    assert board.board_names() == ['level:1', 'level:2', 'projectile:bomb']
+    assert board.page('projectile:bomb', 0, 10) == [(1, 'ann', 200)]
+
+
+def test_history_rebuilds_the_boards(paths):
+    board = Leaderboard(**paths)
+    for score in range(10):
+        board.record('ann', score)
+    board.flush()
+    board.record('bob', 99)  # after the snapshot, only in the history
+
+    reloaded = Leaderboard(**paths)
+    assert reloaded.page(OVERALL, 0, 2) == [(1, 'bob', 99), (2, 'ann', 9)]
+    assert reloaded.size(OVERALL) == 11
+
+
+def test_snapshot_is_written_every_few_runs(paths, monkeypatch):
+    monkeypatch.setattr(leaderboard, 'SNAPSHOT_EVERY', 3)
+    board = Leaderboard(**paths)
+    saves = []
+    save = board.save
+
+    def counting_save():
+        saves.append(board.unsaved)
+        save()
+    monkeypatch.setattr(board, 'save', counting_save)
+    for score in range(7):
+        board.record('ann', score)
+    assert saves == [3, 3]
+    board.flush()
+    assert saves == [3, 3, 1]
+
+
+def test_a_run_cut_off_mid_write_is_dropped(paths):
+    board = Leaderboard(**paths)
+    board.record('ann', 10)
+    with open(paths['history_path'], 'ab') as file:
+        file.write(b'{"board": "overall", "username": "bo')
+    reloaded = Leaderboard(**paths)
+    assert reloaded.page(OVERALL, 0, 10) == [(1, 'ann', 10)]
+    reloaded.record('cid', 20)
+    assert Leaderboard(**paths).page(OVERALL, 0, 10) == [(1, 'cid', 20), (2, 'ann', 10)]
+
+
+def test_old_high_scores_are_migrated(paths):
+    with open(paths['legacy_path'], 'w') as file:
+        file.write('ann: 300\nbob: 200\nnot a score\n')
+    board = Leaderboard(**paths)
+    assert board.page(OVERALL, 0, 10) == [(1, 'ann', 300), (2, 'bob', 200)]
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from levels import LevelPack, compile_levels, read_levels, validate_layout, LAYOUT_SIZE
+
+LEVEL_1 = ['nnnnnnnnnnrnnntnnnrnnnnnnnrnnnnnnnnnnnnnnnnnnnnn3',
+           'npnnnnnnnpnnnnnnnpnnnnnnnpnnnnnnntnnnnnnnpnnnnnn4']
+LEVEL_2 = ['mnnnnnnnnnnnnnnnnnnnnnnntnnnnnnnnnnnnnnnnnnnnnnr5']
+
+
+@pytest.fixture
+def pack_path(tmp_path):
+    (tmp_path / '1.txt').write_text('\n'.join(LEVEL_1) + '\n')
+    (tmp_path / '2.txt').write_text('\r\n'.join(LEVEL_2) + '\r\n\r\n')
+    (tmp_path / '3.txt').write_text('')  # not written yet, left out of the pack
+    path = tmp_path / 'levels.pack'
+    compile_levels(sorted(str(file) for file in tmp_path.glob('*.txt')), str(path))
+    return path
+
+
+def test_read_levels_drops_line_endings_and_blank_lines(tmp_path):
+    path = tmp_path / '1.txt'
+    path.write_text('\r\n'.join(LEVEL_1) + '\r\n\r\n')
+    assert read_levels(str(path)) == LEVEL_1
+
+
+def test_pack_round_trip(pack_path):
+    pack = LevelPack(str(pack_path))
+    assert sorted(pack.levels) == [1, 2]
+    assert [pack.layout(1, i) for i in range(pack.count(1))] == LEVEL_1
+    assert pack.layout(2, 0) == LEVEL_2[0]
+    with pytest.raises(IndexError):
+        pack.layout(2, 1)
+    assert pack.random_layout(1, random.Random(7)) == pack.random_layout(1, random.Random(7))
+    pack.close()
+
+
+def test_corrupt_record_is_rejected(pack_path):
+    data = bytearray(pack_path.read_bytes())
+    record = data.index(LEVEL_1[1].encode('ascii'))
+    data[record] = ord('r')
+    pack_path.write_bytes(bytes(data))
+    pack = LevelPack(str(pack_path))
+    assert pack.layout(1, 0) == LEVEL_1[0]
+    with pytest.raises(ValueError, match='corrupt'):
+        pack.layout(1, 1)
+    pack.close()
+
+
+def test_truncated_pack_is_rejected(pack_path):
+    pack_path.write_bytes(pack_path.read_bytes()[:-1])
+    with pytest.raises(ValueError, match='truncated'):
+        LevelPack(str(pack_path))
+
+
+@pytest.mark.parametrize('layout, message', [
+    (LEVEL_1[0][:-2] + '3', f'expected {LAYOUT_SIZE}'),
+    ('x' + LEVEL_1[0][1:], 'unknown tiles'),
+    (LEVEL_1[0][:-1] + '0', 'number of shots'),
+    (LEVEL_1[0].replace('t', 'n'), 'no target'),
+])
+def test_invalid_layouts(layout, message):
+    with pytest.raises(ValueError, match=message):
+        validate_layout(layout, 'test')
+
+
+def test_failed_compile_keeps_the_old_pack(tmp_path, pack_path):
+    before = pack_path.read_bytes()
+    bad = tmp_path / '4.txt'
+    bad.write_text('too short3\n')
+    with pytest.raises(ValueError):
+        compile_levels([str(bad)], str(pack_path))
+    assert pack_path.read_bytes() == before
@@ -0,0 +1,92 @@
+import pytest
+
+pytest.importorskip('kivy')
+
+import prefetch  # noqa: E402
+from prefetch import LevelPrefetcher  # noqa: E402
+
+from helpers import FakeClock, coord, make_layout  # noqa: E402
+
+LAYOUTS = {(1, 0): make_layout({coord(7, 0): 't'}), (1, 1): make_layout({coord(7, 5): 't'})}
+
+
+def fake_get_level(n, index=None):
+    if (n, index) not in LAYOUTS:
+        raise ValueError(f'no layout {index} in level {n}')
+    return LAYOUTS[n, index]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(prefetch, 'Clock', clock)
+    monkeypatch.setattr(prefetch, 'get_level', fake_get_level)
+    monkeypatch.setattr(prefetch, 'BoardMesh', lambda board: ('mesh', board.key))
+    return clock
+
+
+@pytest.fixture
+def prefetcher(clock):
+    prefetcher = LevelPrefetcher(30)
+    yield prefetcher
+    prefetcher.executor.shutdown()
+
+
+def settle(prefetcher):
+    # the single worker runs jobs in order, done callbacks included
+    prefetcher.executor.submit(lambda: None).result()
+
+
+def test_take_a_warmed_prefetch(prefetcher, clock):
+    prefetcher.prefetch(0, 1)
+    settle(prefetcher)
+    clock.frame()
+    leveldata, world, mesh = prefetcher.take(0, 1)
+    assert leveldata == LAYOUTS[1, 1]
+    assert world.board.key == bytes(''.join(LAYOUTS[1, 1][:-1]), 'ascii')
+    assert mesh == ('mesh', world.board.key)
+
+
+def test_take_before_the_mesh_is_built(prefetcher):
+    prefetcher.prefetch(0, 0)
+    leveldata, world, mesh = prefetcher.take(0, 0)  # waits for the worker
+    assert leveldata == LAYOUTS[1, 0] and world is not None
+    assert mesh is None
+
+
+def test_take_a_layout_that_was_never_prefetched(prefetcher):
+    prefetcher.prefetch(0, 0)
+    assert prefetcher.take(0, 1) is None
+    assert not prefetcher.futures and not prefetcher.meshes
+
+
+def test_take_a_prefetch_that_raised(prefetcher, clock):
+    prefetcher.prefetch(0, 7)
+    settle(prefetcher)
+    clock.frame()  # warm skips the failed load
+    assert not prefetcher.meshes
+    assert prefetcher.take(0, 7) is None
+
+
+def test_take_drops_the_other_prefetches(prefetcher, clock):
+    prefetcher.prefetch(0, 0)
+    prefetcher.prefetch(0, 1)
+    settle(prefetcher)
+    clock.frame()
+    assert len(prefetcher.meshes) == 2
+    assert prefetcher.take(0, 0) is not None
+    assert not prefetcher.futures and not prefetcher.meshes
+
+
+def test_warm_ignores_a_superseded_future(prefetcher):
+    key = (0, 1)
+    prefetcher.prefetch(*key)
+    old = prefetcher.futures[key]
+    prefetcher.take(*key)
+    prefetcher.prefetch(*key)
+    new = prefetcher.futures[key]
+    settle(prefetcher)
+    prefetcher.warm(key, old)
+    assert key not in prefetcher.meshes
+    prefetcher.warm(key, new)
+    assert key in prefetcher.meshes
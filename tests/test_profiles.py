@@ -0,0 +1,65 @@
+import pytest
+
+from profiles import ProfileStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ProfileStore(str(tmp_path / 'profiles.db'), str(tmp_path / 'profiles.txt'))
+    yield store
+    store.close()
+
+
+def all_pages(store, page_size, **kwargs):
+    pages = []
+    after = None
+    while True:
+        page = store.page(page_size, after, **kwargs)
+        pages.append(page)
+        if len(page) < page_size:
+            return pages
+        after = page[-1]
+
+
+def test_save_replaces_an_earlier_save(store):
+    store.save('ann', 1, 100)
+    store.save('bob', 0, 0)
+    store.save('ann', 2, 300)
+    assert [(p.username, p.level, p.score) for p in store.page(10)] == [('ann', 2, 300), ('bob', 0, 0)]
+
+
+def test_keyset_pages_cover_every_profile_once(store):
+    # plenty of equal timestamps, which only the username can order
+    rows = [(f'user{i:03}', i % 4, i, float(i // 7)) for i in range(100)]
+    with store.db:
+        store.db.executemany('INSERT INTO profiles VALUES (?, ?, ?, ?)', rows)
+    pages = all_pages(store, 9)
+    names = [profile.username for page in pages for profile in page]
+    expected = [row[0] for row in sorted(rows, key=lambda row: (-row[3], row[0]))]
+    assert names == expected
+    assert all(len(page) == 9 for page in pages[:-1])
+
+
+def test_legacy_file_is_imported_once(tmp_path):
+    legacy = tmp_path / 'profiles.txt'
+    legacy.write_text('newest%2%500\nodd%name%1%10\nbroken line\noldest%0%0\n')
+    path = str(tmp_path / 'profiles.db')
+    store = ProfileStore(path, str(legacy))
+    assert [(p.username, p.level, p.score) for p in store.page(10)] == [
+        ('newest', 2, 500), ('odd%name', 1, 10), ('oldest', 0, 0)]
+    store.close()
+
+    legacy.write_text('late%1%1\n')
+    store = ProfileStore(path, str(legacy))
+    assert len(store.page(10)) == 3
+    store.close()
+
+
+def test_search_pages_match_substrings_literally(store):
+    for name in ['Alice', 'malice', 'bob', '100%_sure', '100 sure']:
+        store.save(name, 0, 0)
+    assert sorted(p.username for p in store.page(10, search='ALI')) == ['Alice', 'malice']
+    # % and _ are matched as themselves, not as wildcards
+    assert [p.username for p in store.page(10, search='%_')] == ['100%_sure']
+    pages = all_pages(store, 1, search='lice')
+    assert sorted(p.username for page in pages for p in page) == ['Alice', 'malice']
@@ -0,0 +1,64 @@
+import random
+
+from levels import get_level, pick_layout
+from replay import Recorder, Recording, InputState, replay, replay_segment, seed_matches, AIM, FIRE, CYCLE, VELOCITY
+from simulation import World, PROJECTILE_TYPES
+
+LAYOUT = list('nnnnnnnnnnrnnntnnnrnnnnnnnrnnnnnnnnnnnnnnnnnnnnn3')
+CONTROLS = (0.0, 0, 1)  # angle, projectile index, muzzle velocity
+
+
+def record(path, seed=42, layouts=(LAYOUT,), username='ann'):
+    recorder = Recorder(str(path), seed, 30, username, 0, 150, CONTROLS)
+    for level, layout in enumerate(layouts):
+        recorder.level(level, layout)
+        recorder.aim(0, 10.0)
+        recorder.aim(0, 12.5)  # same tick: only the last aim is kept
+        recorder.velocity(0, 3)
+        recorder.fire(0)
+        recorder.aim(5, -4.0)
+        recorder.cycle(6, 1)
+        recorder.fire(6)
+    recorder.close()
+    return Recording(str(path))
+
+
+def test_round_trip(tmp_path):
+    recording = record(tmp_path / 'session.crpl', layouts=(LAYOUT, LAYOUT[::-1]))
+    assert (recording.seed, recording.tick_rate, recording.username, recording.level, recording.score) == \
+        (42, 30, 'ann', 0, 150)
+    assert (recording.angle, recording.projectile_index, recording.muzzle_velocity) == CONTROLS
+    assert [segment.layout for segment in recording.segments] == [LAYOUT, LAYOUT[::-1]]
+    assert [(event.kind, event.tick, event.value) for event in recording.segments[0].inputs] == [
+        (AIM, 0, 12.5), (VELOCITY, 0, 3), (FIRE, 0, None), (AIM, 5, -4.0), (CYCLE, 6, 1), (FIRE, 6, None)]
+
+
+def test_a_cut_off_log_keeps_what_was_written(tmp_path):
+    path = tmp_path / 'session.crpl'
+    full = record(path)
+    path.write_bytes(path.read_bytes()[:-3])
+    recording = Recording(str(path))
+    assert recording.segments[0].inputs == full.segments[0].inputs[:-1]
+
+
+def test_replay_matches_driving_the_world_directly(tmp_path):
+    recording = record(tmp_path / 'session.crpl')
+    world, _ = replay_segment(recording.segments[0], recording.tick_rate, InputState(recording))
+
+    expected = World(LAYOUT, 30)
+    expected.fire(12.5, 3, PROJECTILE_TYPES[0])
+    for _ in range(6):
+        expected.step()
+    expected.fire(-4.0, 3, PROJECTILE_TYPES[1])
+    while expected.projectiles:
+        expected.step()
+    assert world.board.key == expected.board.key
+    assert replay(recording) == replay(recording)
+
+
+def test_seed_reproduces_the_layouts_it_picked(tmp_path):
+    rng = random.Random(7)
+    layouts = [get_level(level + 1, index=pick_layout(level + 1, rng)) for level in range(2)]
+    assert seed_matches(record(tmp_path / 'same.crpl', seed=7, layouts=layouts))
+    edited = [layouts[0], ['n'] * 48 + ['3']]
+    assert not seed_matches(record(tmp_path / 'edited.crpl', seed=7, layouts=edited))
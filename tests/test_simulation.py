@@ -0,0 +1,111 @@
+import pytest
+
+from levels import read_levels
+from simulation import World, Board, COLUMNS, ROWS, BOARD_X, TILE_SIZE, sweep_tile, trace_laser, laser_path
+
+from helpers import coord, make_layout, run, wall
+
+
+def test_sweep_tile_reports_the_face_entered_first():
+    # a 10 unit box moving 200 to the right meets a tile whose left edge is at 100
+    assert sweep_tile(0, 50, 200, 0, 10, 100, 0) == (pytest.approx(0.45), 'x')
+    assert sweep_tile(50, 0, 0, 200, 10, 0, 100) == (pytest.approx(0.45), 'y')
+
+
+def test_sweep_tile_misses():
+    assert sweep_tile(0, 500, 200, 0, 10, 100, 0) is None  # passes above
+    assert sweep_tile(0, 50, 50, 0, 10, 100, 0) is None  # stops short
+    assert sweep_tile(0, 50, -200, 0, 10, 100, 0) is None  # moves away
+
+
+def test_touching_lists_collidable_tiles_under_a_box():
+    board = Board(make_layout({coord(0, 0): 'r', coord(1, 0): 'g', coord(1, 1): 'p'}))
+    assert list(board.touching(480, 0, 360, 360)) == [(coord(0, 0), 'r'), (coord(1, 1), 'p')]
+
+
+def test_fast_bullet_does_not_tunnel_through_a_rock():
+    # at three ticks a second a bullet moves far more than a tile per step
+    world = World(make_layout(wall(0)), tick_rate=3)
+    projectile = world.fire(0, 5, 'bullet')
+    events = run(world)
+    destroyed = [event.coord for event in events if event.kind == 'destroyed']
+    assert len(destroyed) == 1 and destroyed[0] % COLUMNS == 0
+    assert [event.kind for event in events] == ['destroyed', 'stopped']
+    assert not projectile.alive
+    assert world.board.element(destroyed[0]) == 'n'
+
+
+def test_bullet_stops_at_the_first_of_two_walls():
+    world = World(make_layout({**wall(2), **wall(4)}), tick_rate=3)
+    world.fire(0, 5, 'bullet')
+    events = run(world)
+    destroyed = [event.coord for event in events if event.kind == 'destroyed']
+    assert len(destroyed) == 1 and destroyed[0] % COLUMNS == 2
+    assert all(world.board.element(tile) == 'r' for tile in wall(4))
+
+
+def test_bullet_between_two_rows_destroys_one_rock():
+    # this shot reaches rocks 18 and 26 at the same instant; the first one stops it
+    world = World(read_levels('assets/level_data/1.txt')[0])
+    world.fire(16, 2, 'bullet')
+    events = run(world)
+    assert [(event.kind, event.coord) for event in events] == [('destroyed', 18), ('stopped', 18)]
+    assert world.board.element(26) == 'r'
+
+
+def trace(tiles, y=630):
+    # a laser fired straight right through the middle of row 3
+    return trace_laser(bytes(Board(make_layout(tiles)).cells), 0, y, 1, 0)
+
+
+def test_laser_crosses_an_empty_board():
+    path = trace({})
+    assert [kind for _, kind, _ in path.marks] == ['left']
+    assert path.points[-1] == (pytest.approx(1920), pytest.approx(630))
+
+
+def test_laser_ends_on_the_first_rock_or_target():
+    path = trace({coord(3, 3): 'r', coord(5, 3): 't'})
+    assert path.marks == [(pytest.approx(BOARD_X + 3 * TILE_SIZE), 'stopped', coord(3, 3))]
+    path = trace({coord(5, 3): 't'})
+    assert [(kind, tile) for _, kind, tile in path.marks] == [('target', coord(5, 3))]
+
+
+def test_laser_bounces_off_a_mirror():
+    path = trace({coord(2, 3): 'm'})
+    assert [(kind, tile) for _, kind, tile in path.marks] == [('reflected', coord(2, 3)), ('left', None)]
+    assert path.points[1] == (pytest.approx(BOARD_X + 2 * TILE_SIZE), pytest.approx(630))
+    assert path.points[-1][0] == pytest.approx(0)  # straight back out the left edge
+
+
+def test_laser_shot_follows_its_path():
+    layout = make_layout({coord(4, 3): 't'})
+    world = World(layout)
+    world.fire(0, 1, 'laser')
+    events = run(world)
+    assert [(event.kind, event.coord) for event in events] == [
+        ('target', coord(4, 3)), ('stopped', coord(4, 3))]
+    assert laser_path(bytes(world.board.cells), 0).marks[-1][1:] == ('target', coord(4, 3))
+
+
+def test_blast_radius_is_a_circle():
+    board = Board(make_layout({tile: 'r' for tile in range(COLUMNS * ROWS)}))
+    centre_x, centre_y = BOARD_X + TILE_SIZE / 2, TILE_SIZE / 2
+    # the diagonal neighbour is inside the circle's bounding box but 127 away
+    assert [tile for tile, _ in board.in_radius(centre_x, centre_y, 120)] == [
+        coord(0, 0), coord(1, 0), coord(0, 1)]
+    assert coord(1, 1) in [tile for tile, _ in board.in_radius(centre_x, centre_y, 130)]
+
+
+def test_explosion_destroys_every_rock_in_one_board_update():
+    layout = make_layout({**wall(0), **wall(1), coord(0, 3): 'p'})
+    world = World(layout, tick_rate=3)
+    world.fire(0, 5, 'bomb')
+    events = run(world)
+    exploded = [event for event in events if event.kind == 'exploded']
+    destroyed = [event.coord for event in events if event.kind == 'destroyed']
+    assert len(exploded) == 1 and len(exploded[0].coord) > 1
+    assert list(exploded[0].coord) == destroyed
+    assert world.board.version == 1
+    assert all(world.board.element(tile) == 'n' for tile in destroyed)
+    assert world.board.element(coord(0, 3)) == 'p'  # only rocks go
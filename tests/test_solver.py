@@ -0,0 +1,42 @@
+from simulation import Board, simulate_shot
+from solver import candidate_shots, is_dead, solve_layout
+
+from helpers import coord, make_layout, wall
+
+
+def job(layout, angle_step=30, time_limit=30):
+    return ('level.txt', 1, layout, angle_step, 1000, time_limit)
+
+
+def test_candidate_shots_try_the_laser_at_one_speed():
+    shots = candidate_shots(45)
+    assert [angle for kind, speed, angle in shots if kind == 'laser'] == [-45, 0, 45]
+    assert {speed for kind, speed, _ in shots if kind == 'bullet'} == {1, 2, 3, 4, 5}
+
+
+def test_rejects_bad_layouts():
+    assert 'expected' in solve_layout(job(['n'] * 48))['error']
+    assert solve_layout(job(make_layout()))['error'] == 'layout has no target'
+
+
+def test_finds_a_one_shot_solution():
+    layout = make_layout({tile: 't' for tile in range(48)}, shots=1)
+    report = solve_layout(job(layout))
+    assert report['solved'] and len(report['solution']) == 1
+    assert not report['timed_out']
+
+
+def test_gives_up_at_the_time_limit():
+    layout = make_layout({**wall(0), coord(7, 5): 't'}, shots=3)
+    report = solve_layout(job(layout, angle_step=1, time_limit=0))
+    assert report['timed_out'] and not report['solved']
+
+
+def test_a_shot_that_touches_a_rock_is_not_dead():
+    layout = make_layout(wall(0))
+    board = Board(layout)
+    # steeply down the laser leaves the screen, level it stops on the wall
+    missed = simulate_shot(layout, -89, 1, 'laser', 300)
+    assert is_dead(missed, board)
+    stopped = simulate_shot(layout, 0, 1, 'laser', 300)
+    assert stopped.board.key == board.key and not is_dead(stopped, board)
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from startup import StartupProfiler
+
+
+def test_marks_and_spans_are_reported():
+    profiler = StartupProfiler()
+    profiler.mark('imports')
+    for _ in range(2):
+        with profiler.span('kv parse'):
+            time.sleep(0.001)
+    report = profiler.report()
+    assert report.startswith('imports at ')
+    assert 'kv parse ' in report and '(2x)' in report
+
+
+def test_span_is_timed_when_the_body_raises():
+    profiler = StartupProfiler()
+    with pytest.raises(KeyError):
+        with profiler.span('build'):
+            raise KeyError
+    assert profiler.spans['build'][1] == 1
+
+
+def test_screens_are_built_on_first_use():
+    pytest.importorskip('kivy')
+    from kivy.uix.screenmanager import Screen
+    from main import LazyScreenManager
+
+    built = []
+
+    def factory(**kwargs):
+        built.append(kwargs['name'])
+        return Screen(**kwargs)
+
+    manager = LazyScreenManager()
+    manager.warm_up = False
+    for name in ('menu', 'game', 'help'):
+        manager.register(name, factory, ('game',))
+    assert built == [] and not manager.has_screen('game')
+
+    manager.current = 'menu'
+    assert built == ['menu']
+    assert manager.get_screen('help').name == 'help'
+    assert manager.get_screen('help') is manager.get_screen('help')
+    assert built == ['menu', 'help']
+
+
+def test_likely_next_screens_are_warmed_one_at_a_time():
+    pytest.importorskip('kivy')
+    from kivy.uix.screenmanager import Screen
+    from main import LazyScreenManager
+
+    manager = LazyScreenManager()
+    manager.register('menu', Screen, ('hof', 'help'))
+    manager.register('hof', Screen)
+    manager.register('help', Screen)
+    manager.current = 'menu'
+    assert manager.warm_queue == ['hof', 'help']
+    manager.warm_next(0)
+    assert manager.has_screen('hof') and not manager.has_screen('help')
+    manager.warm_next(0)
+    assert manager.has_screen('help') and manager.warm_queue == []